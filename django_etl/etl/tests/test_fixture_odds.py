@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import sys
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from ..models import FixtureOdds, SofasportFixture
+
+# Add sofa_sport scripts to path (same as the sync_fixture_odds command)
+scripts_path = Path(__file__).resolve().parent.parent.parent / "sofa_sport" / "scripts"
+sys.path.insert(0, str(scripts_path))
+
+from fetch_fixture_odds import ParsedOdds, parse_odds_response, update_fixture_odds_bulk  # noqa: E402
+
+
+def _full_odds(home: str) -> ParsedOdds:
+    return ParsedOdds(
+        home_odds=Decimal(home),
+        draw_odds=Decimal("3.40"),
+        away_odds=Decimal("4.20"),
+        over_under_line=Decimal("2.5"),
+        over_odds=Decimal("1.90"),
+        under_odds=Decimal("1.95"),
+        btts_yes_odds=Decimal("1.70"),
+        btts_no_odds=Decimal("2.10"),
+    )
+
+
+def _market(group: str, name: str, choices: dict[str, str], period: str = "Full-time") -> dict:
+    return {
+        "marketGroup": group,
+        "marketName": name,
+        "marketPeriod": period,
+        "choices": [{"name": choice, "fractionalValue": value} for choice, value in choices.items()],
+    }
+
+
+class ParseOddsResponseTests(SimpleTestCase):
+    def test_parses_each_market(self) -> None:
+        parsed = parse_odds_response({"data": [
+            _market("1X2", "Full time", {"1": "1.85", "X": "3.4", "2": "4.2"}),
+            _market("Match goals", "Over/Under 2.5", {"Over 2.5": "1.9", "Under 2.5": "1.95"}),
+            _market("Both teams to score", "Both teams to score", {"Yes": "1.7", "No": "2.1"}),
+        ]})
+
+        self.assertEqual(parsed, _full_odds("1.85"))
+
+    def test_missing_markets_stay_none(self) -> None:
+        parsed = parse_odds_response({"data": [
+            _market("1X2", "1st half", {"1": "2.5", "X": "2.0", "2": "5.0"}, period="1st half"),
+            _market("Match goals", "Over/Under 1.5", {"Over 1.5": "1.3", "Under 1.5": "3.2"}),
+            _market("Both teams to score", "Both teams to score", {"Yes": "1.7", "No": "2.1"}),
+        ]})
+
+        self.assertIsNone(parsed.home_odds)
+        self.assertIsNone(parsed.over_odds)
+        self.assertIsNone(parsed.over_under_line)
+        self.assertEqual(parsed.btts_yes_odds, Decimal("1.7"))
+
+    def test_stops_once_every_field_is_set(self) -> None:
+        parsed = parse_odds_response({"data": [
+            _market("1X2", "Full time", {"1": "1.85", "X": "3.4", "2": "4.2"}),
+            _market("Match goals", "Over/Under 2.5", {"Over 2.5": "1.9", "Under 2.5": "1.95"}),
+            _market("Both teams to score", "Both teams to score", {"Yes": "1.7", "No": "2.1"}),
+            _market("1X2", "Full time", {"1": "9.0", "X": "9.0", "2": "9.0"}),
+        ]})
+
+        self.assertEqual(parsed.home_odds, Decimal("1.85"))
+
+    def test_response_without_data(self) -> None:
+        self.assertEqual(parse_odds_response({}), ParsedOdds())
+
+
+class UpdateFixtureOddsBulkTests(TestCase):
+    def setUp(self) -> None:
+        self.fixture = SofasportFixture.objects.create(
+            sofasport_event_id=101,
+            home_team_name="Arsenal",
+            away_team_name="Chelsea",
+            sofasport_home_team_id=1,
+            sofasport_away_team_id=2,
+            kickoff_time=timezone.now() + timedelta(days=1),
+            match_status="notstarted",
+        )
+
+    def test_insert(self) -> None:
+        self.assertTrue(update_fixture_odds_bulk([(self.fixture, _full_odds("1.85"))]))
+
+        odds = FixtureOdds.objects.get(fixture=self.fixture)
+        self.assertEqual(odds.home_odds, Decimal("1.85"))
+        self.assertEqual(odds.over_under_line, Decimal("2.5"))
+        self.assertEqual(odds.btts_no_odds, Decimal("2.10"))
+        self.assertIsNone(odds.prev_home_odds)
+        self.assertIsNone(odds.prev_btts_no_odds)
+
+    def test_update_snapshots_previous_odds(self) -> None:
+        update_fixture_odds_bulk([(self.fixture, _full_odds("1.85"))])
+        first_update = FixtureOdds.objects.get(fixture=self.fixture).last_updated
+
+        self.assertTrue(update_fixture_odds_bulk([(self.fixture, _full_odds("2.00"))]))
+
+        odds = FixtureOdds.objects.get(fixture=self.fixture)
+        self.assertEqual(FixtureOdds.objects.count(), 1)
+        self.assertEqual(odds.home_odds, Decimal("2.00"))
+        self.assertEqual(odds.prev_home_odds, Decimal("1.85"))
+        self.assertEqual(odds.prev_draw_odds, Decimal("3.40"))
+        self.assertEqual(odds.prev_btts_no_odds, Decimal("2.10"))
+        self.assertGreaterEqual(odds.last_updated, first_update)
+
+    def test_partial_response_keeps_stored_odds(self) -> None:
+        update_fixture_odds_bulk([(self.fixture, _full_odds("1.85"))])
+
+        only_1x2 = ParsedOdds(
+            home_odds=Decimal("2.00"), draw_odds=Decimal("3.30"), away_odds=Decimal("4.00")
+        )
+        self.assertTrue(update_fixture_odds_bulk([(self.fixture, only_1x2)]))
+
+        odds = FixtureOdds.objects.get(fixture=self.fixture)
+        self.assertEqual(odds.home_odds, Decimal("2.00"))
+        self.assertEqual(odds.prev_home_odds, Decimal("1.85"))
+        # markets missing from the response keep their stored odds
+        self.assertEqual(odds.over_under_line, Decimal("2.5"))
+        self.assertEqual(odds.over_odds, Decimal("1.90"))
+        self.assertEqual(odds.btts_yes_odds, Decimal("1.70"))
+        self.assertEqual(odds.prev_over_odds, Decimal("1.90"))
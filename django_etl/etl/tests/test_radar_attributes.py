@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+# Add sofa_sport scripts to path (same as the sync_fixture_odds command)
+scripts_path = Path(__file__).resolve().parent.parent.parent / "sofa_sport" / "scripts"
+sys.path.insert(0, str(scripts_path))
+
+from build_radar_attributes_etl import extract_attributes  # noqa: E402
+
+
+def _overview(**overrides) -> dict:
+    overview = {
+        "attacking": 71,
+        "technical": 64,
+        "tactical": 46,
+        "defending": 33,
+        "creativity": 69,
+        "position": "F",
+        "yearShift": 0,
+        "id": 62847,
+    }
+    overview.update(overrides)
+    return overview
+
+
+class ExtractAttributesTests(SimpleTestCase):
+    def test_current_season_first(self) -> None:
+        attributes = extract_attributes({"data": {
+            "playerAttributeOverviews": [_overview(), _overview(attacking=50, yearShift=1)],
+            "averageAttributeOverviews": [_overview(attacking=10)],
+        }})
+
+        self.assertEqual(attributes, {
+            "attacking": 71,
+            "technical": 64,
+            "tactical": 46,
+            "defending": 33,
+            "creativity": 69,
+            "position": "F",
+            "year_shift": 0,
+            "is_average": False,
+        })
+
+    def test_falls_back_to_career_average(self) -> None:
+        attributes = extract_attributes({"data": {
+            "playerAttributeOverviews": [],
+            "averageAttributeOverviews": [_overview(attacking=52, position="M")],
+        }})
+
+        assert attributes is not None
+        self.assertTrue(attributes["is_average"])
+        self.assertEqual(attributes["attacking"], 52)
+        self.assertEqual(attributes["position"], "M")
+
+    def test_missing_keys_become_none(self) -> None:
+        overview = _overview()
+        del overview["creativity"], overview["yearShift"]
+
+        attributes = extract_attributes({"data": {"playerAttributeOverviews": [overview]}})
+
+        assert attributes is not None
+        self.assertIsNone(attributes["creativity"])
+        self.assertEqual(attributes["year_shift"], 0)
+        self.assertEqual(attributes["attacking"], 71)
+
+    def test_no_overviews(self) -> None:
+        self.assertIsNone(extract_attributes({"data": {}}))
+        self.assertIsNone(extract_attributes({}))
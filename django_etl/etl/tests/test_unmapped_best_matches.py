@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+import unittest
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+# Add sofa_sport scripts to path (same as the sync_fixture_odds command)
+scripts_path = Path(__file__).resolve().parent.parent.parent / "sofa_sport" / "scripts"
+sys.path.insert(0, str(scripts_path))
+
+# rapidfuzz comes from sofa_sport/requirements.txt, not the Django service requirements
+HAS_RAPIDFUZZ = importlib.util.find_spec("rapidfuzz") is not None
+if HAS_RAPIDFUZZ:
+    from show_unmapped_best_matches import build_prefix_index, fuzzy_match_player_detailed  # noqa: E402
+
+SQUAD = [
+    {"id": "1", "name": "Trent Alexander-Arnold", "short_name": "T. Alexander-Arnold"},
+    {"id": "2", "name": "Lewis O'Brien", "short_name": "L. O'Brien"},
+    {"id": "3", "name": "Jarell Quansah", "short_name": "J. Quansah"},
+]
+
+
+def _match_ids(full_name: str, web_name: str, second_name: str) -> list[tuple[str, int]]:
+    fpl_player = {"full_name": full_name, "web_name": web_name, "second_name": second_name}
+    return [(player["id"], score) for player, score in fuzzy_match_player_detailed(fpl_player, SQUAD)]
+
+
+@unittest.skipUnless(HAS_RAPIDFUZZ, "rapidfuzz is not installed")
+class FuzzyMatchPlayerDetailedTests(SimpleTestCase):
+    def test_token_sort_ignores_punctuation(self) -> None:
+        # without default_process these token sort scores are 95 and 54
+        self.assertEqual(
+            _match_ids("Arnold Trent Alexander", "Trent", "Arnold"),
+            [("1", 100), ("2", 50)],
+        )
+        self.assertEqual(
+            _match_ids("Brien Lewis O", "Lewis", "Brien"),
+            [("2", 100), ("1", 55)],
+        )
+
+    def test_exact_name(self) -> None:
+        self.assertEqual(_match_ids("Jarell Quansah", "Quansah", "Quansah"), [("3", 100)])
+
+
+@unittest.skipUnless(HAS_RAPIDFUZZ, "rapidfuzz is not installed")
+class PrefixPreFilterTests(SimpleTestCase):
+    squad = [
+        {"id": "1", "name": "Mudassir Xavier-Longname", "short_name": "M. Xavier-Longname"},
+        {"id": "2", "name": "Mychajlo Moudryk", "short_name": "M. Moudryk"},
+        {"id": "3", "name": "Cole Palmer", "short_name": "C. Palmer"},
+    ]
+
+    def _match_ids(self, full_name: str, web_name: str, second_name: str) -> list[tuple[str, int]]:
+        fpl_player = {"full_name": full_name, "web_name": web_name, "second_name": second_name}
+        matches = fuzzy_match_player_detailed(
+            fpl_player, self.squad, prefix_index=build_prefix_index(self.squad)
+        )
+        return [(player["id"], score) for player, score in matches]
+
+    def test_scores_prefix_candidates(self) -> None:
+        self.assertEqual(self._match_ids("Cole Palmer", "Palmer", "Palmer"), [("3", 100)])
+
+    def test_rescores_squad_when_no_candidate_reaches_threshold(self) -> None:
+        # "mud" only matches the unrelated squad-mate, the transliterated name shares no prefix
+        self.assertEqual(self._match_ids("Mykhailo Mudryk", "Mudryk", "Mudryk"), [("2", 84)])
@@ -4,17 +4,60 @@ SofaSport API Client
 Handles all API calls to SofaSport API with proper error handling and rate limiting.
 """
 import os
+import orjson
 import requests
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 # Load environment variables from the sofa_sport directory
 _script_dir = Path(__file__).parent.parent  # sofa_sport directory
 _env_path = _script_dir / ".env"
 load_dotenv(_env_path)
 
+# Keep-alive connections kept per session (all requests go to a single host)
+POOL_SIZE = 16
+REQUEST_TIMEOUT = 30  # seconds
+# Requests per second shared by every thread using a client (SofaSport allows 27/s)
+SOFASPORT_MAX_RATE = 27
+RATE_LIMIT = float(os.getenv('SOFASPORT_RATE_LIMIT', '15'))
+if not 0 < RATE_LIMIT <= SOFASPORT_MAX_RATE:
+    raise ValueError(
+        f"SOFASPORT_RATE_LIMIT must be greater than 0 and at most {SOFASPORT_MAX_RATE} "
+        f"requests/second, got {RATE_LIMIT}"
+    )
+# Most fixture pages requested ahead of the one being processed
+PAGE_PREFETCH = 4
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 1/rate seconds apart across all threads.
+    
+    Each caller reserves the next free slot under a lock and sleeps outside it,
+    so concurrent callers queue up without holding each other up longer than
+    the rate requires.
+    """
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+    
+    def wait(self) -> None:
+        """Block until the caller may send its request."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
 
 class SofaSportClient:
     """Client for interacting with SofaSport API."""
@@ -33,16 +76,36 @@ class SofaSportClient:
             "x-rapidapi-host": self.api_host
         }
         self.base_url = f"https://{self.api_host}/v1"
+        self._local = threading.local()
+        self._rate_limiter = RateLimiter(RATE_LIMIT)
+    
+    @property
+    def session(self) -> requests.Session:
+        """
+        Pooled session for the calling thread.
+        
+        Reusing a session keeps the TLS connection alive between calls instead
+        of handshaking on every request. Sessions are kept per thread because
+        requests.Session is not guaranteed to be thread-safe.
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            session.mount('https://', HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
+            self._local.session = session
+        return session
     
     def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Make API request with error handling."""
         url = f"{self.base_url}/{endpoint}"
         
+        self._rate_limiter.wait()
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return orjson.loads(response.content)
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             print(f"Error making request to {endpoint}: {e}")
             return {}
     
@@ -65,14 +128,12 @@ class SofaSportClient:
             "unique_tournament_id": self.tournament_id,
             "player_stat_type": "overall"
         }
-        time.sleep(0.5)  # Rate limiting
         return self._make_request(endpoint, params)
     
     def get_team_squad(self, team_id: str) -> Dict[str, Any]:
         """Get complete squad list for a specific team."""
         endpoint = "teams/players"
         params = {"team_id": team_id}
-        time.sleep(0.5)  # Rate limiting
         return self._make_request(endpoint, params)
     
     def get_fixtures(self, course: str = "last", page: int = 0) -> Dict[str, Any]:
@@ -93,25 +154,41 @@ class SofaSportClient:
         return self._make_request(endpoint, params)
     
     def get_all_fixtures(self, course: str = "last") -> List[Dict[str, Any]]:
-        """Get all fixtures with pagination."""
+        """
+        Get all fixtures with pagination.
+        
+        Page 0 is fetched on its own. Each page that reports hasNextPage=True widens
+        the prefetch window by one, up to PAGE_PREFETCH pages in flight. Pages are
+        consumed in order and pagination stops at the first failed page or
+        hasNextPage=False. A one- or two-page result therefore costs no extra
+        requests. Longer results may request up to PAGE_PREFETCH - 1 pages past the
+        last one, which are already running and are discarded.
+        """
         all_events = []
-        page = 0
         
-        while True:
-            response = self.get_fixtures(course, page)
+        with ThreadPoolExecutor(max_workers=PAGE_PREFETCH) as pool:
+            pending = deque()
+            next_page = 1
+            window = 1
+            response = self.get_fixtures(course, 0)
             
-            if not response or 'data' not in response:
-                break
-            
-            events = response['data'].get('events', [])
-            all_events.extend(events)
-            
-            has_next = response['data'].get('hasNextPage', False)
-            if not has_next:
-                break
-            
-            page += 1
-            time.sleep(0.5)  # Rate limiting
+            while True:
+                if not response or 'data' not in response:
+                    break
+                
+                events = response['data'].get('events', [])
+                all_events.extend(events)
+                
+                has_next = response['data'].get('hasNextPage', False)
+                if not has_next:
+                    break
+                
+                while len(pending) < window:
+                    pending.append(pool.submit(self.get_fixtures, course, next_page))
+                    next_page += 1
+                window = min(window + 1, PAGE_PREFETCH)
+                
+                response = pending.popleft().result()
         
         return all_events
     
@@ -119,7 +196,6 @@ class SofaSportClient:
         """Get lineups and player stats for a specific event."""
         endpoint = "events/lineups"
         params = {"event_id": event_id}
-        time.sleep(0.5)  # Rate limiting
         return self._make_request(endpoint, params)
     
     def get_player_heatmap(self, player_id: str, event_id: str) -> Dict[str, Any]:
@@ -129,7 +205,6 @@ class SofaSportClient:
             "player_id": player_id,
             "event_id": event_id
         }
-        time.sleep(0.5)  # Rate limiting
         return self._make_request(endpoint, params)
     
     def get_player_season_statistics(self, player_id: str, season_id: Optional[str] = None, 
@@ -154,7 +229,6 @@ class SofaSportClient:
             "player_id": player_id,
             "unique_tournament_id": unique_tournament_id or self.tournament_id
         }
-        time.sleep(0.5)  # Rate limiting
         return self._make_request(endpoint, params)
     
     def get_player_attribute_overviews(self, player_id: str) -> Dict[str, Any]:
@@ -172,7 +246,6 @@ class SofaSportClient:
         """
         endpoint = "players/attribute-overviews"
         params = {"player_id": player_id}
-        time.sleep(0.5)  # Rate limiting
         return self._make_request(endpoint, params)
 
     def get_player_last_events(self, player_id: str, page: int = 0) -> Dict[str, Any]:
@@ -194,7 +267,6 @@ class SofaSportClient:
             "player_id": player_id,
             "page": str(page)
         }
-        time.sleep(0.5)  # Rate limiting
         return self._make_request(endpoint, params)
 
     def get_player_event_statistics(self, player_id: str, event_id: str) -> Dict[str, Any]:
@@ -213,7 +285,6 @@ class SofaSportClient:
             "player_id": player_id,
             "event_id": event_id
         }
-        time.sleep(0.5)  # Rate limiting
         return self._make_request(endpoint, params)
 
     def get_competition_fixtures(self, tournament_id: str, season_id: str, 
@@ -234,7 +305,6 @@ class SofaSportClient:
             "course_events": course,
             "page": str(page)
         }
-        time.sleep(0.5)  # Rate limiting
         return self._make_request(endpoint, params)
 
     def get_all_competition_fixtures(self, tournament_id: str, season_id: str, 
@@ -257,7 +327,6 @@ class SofaSportClient:
                 break
             
             page += 1
-            time.sleep(0.5)  # Rate limiting
         
         return all_events
 
@@ -279,7 +348,6 @@ class SofaSportClient:
             "course_events": course,
             "page": str(page)
         }
-        time.sleep(0.5)  # Rate limiting
         return self._make_request(endpoint, params)
 
     def get_all_team_events(self, team_id: str, course: str = "last") -> List[Dict[str, Any]]:
@@ -301,7 +369,6 @@ class SofaSportClient:
                 break
             
             page += 1
-            time.sleep(0.5)  # Rate limiting
         
         return all_events
 
@@ -30,6 +30,7 @@ from django.db import transaction
 from django.conf import settings
 from etl.models import Team, SofasportFixture, SofasportLineup, Athlete
 from api_client import SofaSportClient
+from mapping_loader import load_player_mapping
 
 # Get mappings directory
 MAPPINGS_DIR = Path(settings.BASE_DIR) / 'sofa_sport' / 'mappings'
@@ -72,13 +73,6 @@ def load_team_mapping() -> Dict[int, Dict]:
         return json.load(f)
 
 
-def load_player_mapping() -> Dict[int, Dict]:
-    """Load the player mapping from JSON file."""
-    mapping_path = MAPPINGS_DIR / "player_mapping.json"
-    with open(mapping_path, 'r') as f:
-        return json.load(f)
-
-
 def get_pl_team_sofasport_ids(team_mapping: Dict) -> Set[int]:
     """Get set of SofaSport team IDs for all Premier League teams."""
     return {int(sofasport_id) for sofasport_id in team_mapping.keys()}
@@ -7,9 +7,7 @@ and stores in the sofasport_lineups table.
 
 import os
 import sys
-import json
 from datetime import datetime
-from pathlib import Path
 from typing import Dict, List, Optional
 
 # Add Django app to path
@@ -20,19 +18,9 @@ import django
 django.setup()
 
 from django.db import transaction
-from django.conf import settings
 from etl.models import Athlete, Team, SofasportFixture, SofasportLineup
 from api_client import SofaSportClient
-
-# Get mappings directory relative to Django project root
-MAPPINGS_DIR = Path(settings.BASE_DIR) / 'sofa_sport' / 'mappings'
-
-
-def load_player_mapping() -> Dict[str, Dict]:
-    """Load the player mapping from JSON file."""
-    mapping_path = MAPPINGS_DIR / "player_mapping.json"
-    with open(mapping_path, 'r') as f:
-        return json.load(f)
+from mapping_loader import load_player_mapping
 
 
 def get_fpl_athlete_id(sofasport_player_id: int, player_mapping: Dict) -> Optional[int]:
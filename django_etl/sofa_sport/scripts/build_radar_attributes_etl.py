@@ -59,31 +59,48 @@ API Response Structure:
 Note: We use the FIRST element in playerAttributeOverviews (most recent season).
 If not available, we fall back to averageAttributeOverviews (career average).
 """
+import operator
 import os
 import sys
-import json
 import django
-from pathlib import Path
-from typing import Dict, Optional
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
 
 # Setup Django
 sys.path.append('/app')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fpl_platform.settings')
 django.setup()
 
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
 from api_client import SofaSportClient
-from django.conf import settings
+from mapping_loader import load_player_mapping
 from etl.models import Athlete, SofasportPlayerAttributes
 
-# Get mappings directory relative to Django project root
-MAPPINGS_DIR = Path(settings.BASE_DIR) / 'sofa_sport' / 'mappings'
+# Attribute keys shared by the API overview and the model fields
+_ATTR_KEYS = ('attacking', 'technical', 'tactical', 'defending', 'creativity', 'position')
+_get_attr_values = operator.itemgetter(*_ATTR_KEYS)
 
+# Players written per transaction
+WRITE_BATCH_SIZE = 500
 
-def load_player_mapping() -> Dict:
-    """Load player mapping file."""
-    mapping_path = MAPPINGS_DIR / 'player_mapping.json'
-    with open(mapping_path, 'r') as f:
-        return json.load(f)
+# Attributes change slowly; players refreshed more recently than this are not
+# re-fetched (set to 0 to force a full refresh)
+REFRESH_AFTER = timedelta(hours=int(os.getenv('SOFASPORT_ATTRIBUTES_MAX_AGE_HOURS', '24')))
+
+
+def _overview_to_attributes(overview: Dict, is_average: bool) -> Dict:
+    """Map a single attribute overview onto SofasportPlayerAttributes fields."""
+    try:
+        values = _get_attr_values(overview)
+    except KeyError:
+        values = tuple(overview.get(key) for key in _ATTR_KEYS)
+    return dict(
+        zip(_ATTR_KEYS, values),
+        year_shift=overview.get('yearShift', 0),
+        is_average=is_average,
+    )
 
 
 def extract_attributes(api_response: Dict) -> Optional[Dict]:
@@ -99,46 +116,91 @@ def extract_attributes(api_response: Dict) -> Optional[Dict]:
     """
     data = api_response.get('data', {})
     
-    # Try playerAttributeOverviews first - get the FIRST element (most recent)
-    player_attribute_overviews = data.get('playerAttributeOverviews', [])
+    # Try playerAttributeOverviews first - the first element is always the most recent (yearShift=0)
+    player_attribute_overviews = data.get('playerAttributeOverviews')
     if player_attribute_overviews:
-        # The first element is always the most recent (yearShift=0)
-        overview = player_attribute_overviews[0]
-        return {
-            'attacking': overview.get('attacking'),
-            'technical': overview.get('technical'),
-            'tactical': overview.get('tactical'),
-            'defending': overview.get('defending'),
-            'creativity': overview.get('creativity'),
-            'position': overview.get('position'),
-            'year_shift': overview.get('yearShift', 0),
-            'is_average': False,
-            'raw_data': api_response
-        }
+        return _overview_to_attributes(player_attribute_overviews[0], is_average=False)
     
     # Fallback to averageAttributeOverviews (career average)
-    avg_overviews = data.get('averageAttributeOverviews', [])
+    avg_overviews = data.get('averageAttributeOverviews')
     if avg_overviews:
-        overview = avg_overviews[0]
-        return {
-            'attacking': overview.get('attacking'),
-            'technical': overview.get('technical'),
-            'tactical': overview.get('tactical'),
-            'defending': overview.get('defending'),
-            'creativity': overview.get('creativity'),
-            'position': overview.get('position'),
-            'year_shift': overview.get('yearShift', 0),
-            'is_average': True,
-            'raw_data': api_response
-        }
+        return _overview_to_attributes(avg_overviews[0], is_average=True)
     
     return None
 
 
+def save_player_attributes(sofasport_id: str, athlete: Athlete, attributes_data: Dict) -> bool:
+    """
+    Create or update the attribute row for a player.
+    
+    Returns:
+        True if a new row was created, False if an existing row was updated
+    """
+    existing = SofasportPlayerAttributes.objects.filter(
+        athlete=athlete,
+        year_shift=attributes_data['year_shift'],
+        is_average=attributes_data['is_average']
+    ).first()
+    
+    if existing:
+        for key, value in attributes_data.items():
+            setattr(existing, key, value)
+        existing.sofasport_player_id = int(sofasport_id)
+        existing.save()
+        return False
+    
+    SofasportPlayerAttributes.objects.create(
+        sofasport_player_id=int(sofasport_id),
+        athlete=athlete,
+        **attributes_data
+    )
+    return True
+
+
+def write_player_attributes(fetched: List[Tuple[str, Athlete, Dict]], stats: Dict):
+    """
+    Write fetched attributes to the database.
+    
+    Rows are committed in batches of WRITE_BATCH_SIZE so a single commit covers
+    many players; each row runs in its own savepoint so one bad row only rolls
+    back itself.
+    """
+    print(f"\n{'='*70}")
+    print(f"Writing attributes for {len(fetched)} players...")
+    print(f"{'='*70}\n")
+    
+    for batch_start in range(0, len(fetched), WRITE_BATCH_SIZE):
+        with transaction.atomic():
+            for sofasport_id, athlete, attributes_data in fetched[batch_start:batch_start + WRITE_BATCH_SIZE]:
+                try:
+                    with transaction.atomic():
+                        created = save_player_attributes(sofasport_id, athlete, attributes_data)
+                except Exception as e:
+                    print(f"  ❌ {athlete.web_name}: Error: {str(e)}")
+                    stats['errors'] += 1
+                    continue
+                
+                print(f"  ✅ {'Created' if created else 'Updated'} {athlete.web_name} - "
+                      f"Pos: {attributes_data['position']}, "
+                      f"ATT: {attributes_data['attacking']}, "
+                      f"TEC: {attributes_data['technical']}, "
+                      f"TAC: {attributes_data['tactical']}, "
+                      f"DEF: {attributes_data['defending']}, "
+                      f"CRE: {attributes_data['creativity']}")
+                if attributes_data['is_average']:
+                    print(f"     (Career Average)")
+                
+                stats['created' if created else 'updated'] += 1
+
+
 def process_player_attributes(client: SofaSportClient) -> Dict:
     """
     Process all mapped players to fetch and store attribute data.
     
+    All API calls are made first; the database writes then run in batched
+    transactions so no transaction is held open across HTTP requests.
+    Players whose attributes were updated within REFRESH_AFTER are skipped.
+    
     Returns:
         dict with statistics: created, updated, skipped, errors
     """
@@ -149,14 +211,25 @@ def process_player_attributes(client: SofaSportClient) -> Dict:
         'updated': 0,
         'skipped_no_data': 0,
         'skipped_unmapped': 0,
+        'skipped_fresh': 0,
         'errors': 0
     }
     
+    # Last update per athlete, so fresh players skip the API call entirely
+    last_updated_by_athlete = dict(
+        SofasportPlayerAttributes.objects.values('athlete_id')
+        .annotate(latest=Max('updated_at'))
+        .values_list('athlete_id', 'latest')
+    )
+    fresh_cutoff = timezone.now() - REFRESH_AFTER
+    
     total_players = len(player_mapping)
     print(f"\n{'='*70}")
     print(f"Processing {total_players} mapped players for attribute data...")
     print(f"{'='*70}\n")
     
+    fetched = []
+    
     for i, (sofasport_id, player_data) in enumerate(player_mapping.items(), 1):
         player_name = player_data.get('sofasport_name', 'Unknown')
         fpl_id = player_data.get('fpl_id')
@@ -169,6 +242,13 @@ def process_player_attributes(client: SofaSportClient) -> Dict:
             stats['skipped_unmapped'] += 1
             continue
         
+        # Skip if refreshed recently
+        last_updated = last_updated_by_athlete.get(fpl_id)
+        if last_updated and last_updated > fresh_cutoff:
+            print(f"  ⏭️  Up to date (updated {last_updated:%Y-%m-%d %H:%M}) - skipping")
+            stats['skipped_fresh'] += 1
+            continue
+        
         # Get athlete
         try:
             athlete = Athlete.objects.get(id=fpl_id)
@@ -194,57 +274,15 @@ def process_player_attributes(client: SofaSportClient) -> Dict:
                 stats['skipped_no_data'] += 1
                 continue
             
-            # Check if already exists
-            year_shift = attributes_data['year_shift']
-            is_average = attributes_data['is_average']
-            
-            existing = SofasportPlayerAttributes.objects.filter(
-                athlete=athlete,
-                year_shift=year_shift,
-                is_average=is_average
-            ).first()
-            
-            if existing:
-                # Update existing record
-                for key, value in attributes_data.items():
-                    setattr(existing, key, value)
-                existing.sofasport_player_id = int(sofasport_id)
-                existing.save()
-                
-                print(f"  ✅ Updated - Pos: {attributes_data['position']}, "
-                      f"ATT: {attributes_data['attacking']}, "
-                      f"TEC: {attributes_data['technical']}, "
-                      f"TAC: {attributes_data['tactical']}, "
-                      f"DEF: {attributes_data['defending']}, "
-                      f"CRE: {attributes_data['creativity']}")
-                if is_average:
-                    print(f"     (Career Average)")
-                
-                stats['updated'] += 1
-            else:
-                # Create new record
-                SofasportPlayerAttributes.objects.create(
-                    sofasport_player_id=int(sofasport_id),
-                    athlete=athlete,
-                    **attributes_data
-                )
-                
-                print(f"  ✅ Created - Pos: {attributes_data['position']}, "
-                      f"ATT: {attributes_data['attacking']}, "
-                      f"TEC: {attributes_data['technical']}, "
-                      f"TAC: {attributes_data['tactical']}, "
-                      f"DEF: {attributes_data['defending']}, "
-                      f"CRE: {attributes_data['creativity']}")
-                if is_average:
-                    print(f"     (Career Average)")
-                
-                stats['created'] += 1
+            fetched.append((sofasport_id, athlete, attributes_data))
         
         except Exception as e:
             print(f"  ❌ Error: {str(e)}")
             stats['errors'] += 1
             continue
     
+    write_player_attributes(fetched, stats)
+    
     return stats
 
 
@@ -261,6 +299,7 @@ def display_summary(stats: Dict):
     print(f"📊 Total Processed:   {total_processed}")
     print(f"⚠️  Skipped (No Data): {stats['skipped_no_data']}")
     print(f"⚠️  Skipped (Unmapped):{stats['skipped_unmapped']}")
+    print(f"⏭️  Skipped (Fresh):   {stats['skipped_fresh']}")
     print(f"❌ Errors:            {stats['errors']}")
     print(f"{'='*70}")
     
@@ -270,6 +309,9 @@ def display_summary(stats: Dict):
     
     top_attackers = SofasportPlayerAttributes.objects.filter(
         is_average=False
+    ).select_related('athlete').only(
+        'attacking', 'technical', 'tactical', 'defending', 'creativity',
+        'position', 'athlete__web_name'
     ).order_by('-attacking')[:10]
     
     for i, attr in enumerate(top_attackers, 1):
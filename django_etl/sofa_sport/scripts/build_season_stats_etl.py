@@ -6,10 +6,9 @@ Fetches aggregated season stats from SofaSport API and stores in sofasport_playe
 
 import os
 import sys
-import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from decimal import Decimal, InvalidOperation
-from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 # Add Django app to path
 sys.path.insert(0, '/app')
@@ -19,19 +18,67 @@ import django
 django.setup()
 
 from django.db import transaction
-from django.conf import settings
 from etl.models import Athlete, Team, SofasportPlayerSeasonStats
 from api_client import SofaSportClient
+from mapping_loader import load_player_mapping
 
-# Get mappings directory relative to Django project root
-MAPPINGS_DIR = Path(settings.BASE_DIR) / 'sofa_sport' / 'mappings'
+# Worker threads for the API fan-out. The client's shared RateLimiter caps the
+# combined request rate (SOFASPORT_RATE_LIMIT) under SofaSport's 27 calls/second.
+MAX_WORKERS = int(os.getenv('SOFASPORT_MAX_WORKERS', '8'))
 
+# Players written per transaction
+WRITE_BATCH_SIZE = 500
 
-def load_player_mapping() -> Dict[str, Dict]:
-    """Load the player mapping from JSON file."""
-    mapping_path = MAPPINGS_DIR / "player_mapping.json"
-    with open(mapping_path, 'r') as f:
-        return json.load(f)
+# Quantizers for safe_decimal, keyed by decimal places
+_QUANTIZERS = {places: Decimal(10) ** -places for places in (1, 2, 4)}
+
+# (model field, API key) pairs converted with safe_int
+_INT_FIELDS = (
+    # Key stats
+    ('count_rating', 'countRating'),
+    ('minutes_played', 'minutesPlayed'),
+    ('appearances', 'appearances'),
+    # Attacking stats
+    ('goals', 'goals'),
+    ('assists', 'assists'),
+    ('big_chances_created', 'bigChancesCreated'),
+    ('big_chances_missed', 'bigChancesMissed'),
+    ('total_shots', 'totalShots'),
+    ('shots_on_target', 'shotsOnTarget'),
+    # Passing stats
+    ('accurate_passes', 'accuratePasses'),
+    ('total_passes', 'totalPasses'),
+    ('key_passes', 'keyPasses'),
+    ('accurate_long_balls', 'accurateLongBalls'),
+    # Defensive stats
+    ('tackles', 'tackles'),
+    ('interceptions', 'interceptions'),
+    ('clearances', 'clearances'),
+    # Duel stats
+    ('total_duels_won', 'totalDuelsWon'),
+    ('aerial_duels_won', 'aerialDuelsWon'),
+    ('ground_duels_won', 'groundDuelsWon'),
+    # Discipline
+    ('yellow_cards', 'yellowCards'),
+    ('red_cards', 'redCards'),
+    ('fouls', 'fouls'),
+    ('was_fouled', 'wasFouled'),
+    # Goalkeeper stats
+    ('saves', 'saves'),
+    ('clean_sheets', 'cleanSheet'),
+    ('goals_conceded', 'goalsConceded'),
+)
+
+# (model field, API key, max_digits, decimal_places) converted with safe_decimal
+_DECIMAL_FIELDS = (
+    ('rating', 'rating', 10, 2),
+    ('total_rating', 'totalRating', 8, 2),
+    ('expected_assists', 'expectedAssists', 10, 2),
+    ('accurate_passes_percentage', 'accuratePassesPercentage', 5, 2),
+    ('accurate_long_balls_percentage', 'accurateLongBallsPercentage', 5, 2),
+    ('total_duels_won_percentage', 'totalDuelsWonPercentage', 5, 2),
+    ('saves_percentage', 'savedShotsFromInsideTheBoxPercentage', 5, 2),
+)
 
 
 def safe_decimal(value, max_digits: int = 10, decimal_places: int = 2) -> Optional[Decimal]:
@@ -45,7 +92,8 @@ def safe_decimal(value, max_digits: int = 10, decimal_places: int = 2) -> Option
         # Convert to string first to handle floats properly
         decimal_value = Decimal(str(value))
         # Round to specified decimal places
-        return decimal_value.quantize(Decimal(10) ** -decimal_places)
+        quantizer = _QUANTIZERS.get(decimal_places) or Decimal(10) ** -decimal_places
+        return decimal_value.quantize(quantizer)
     except (InvalidOperation, ValueError, TypeError):
         return None
 
@@ -60,28 +108,59 @@ def safe_int(value) -> Optional[int]:
         return None
 
 
-def process_player_season_stats(
+def fetch_player_season_stats(
     player_mapping_entry: Dict,
     client: SofaSportClient
-) -> Optional[SofasportPlayerSeasonStats]:
+) -> Optional[Dict]:
     """
-    Process season statistics for a single player.
+    Fetch season statistics for a single player from the API.
+    
+    Makes no database calls, so it is safe to run from worker threads.
     
     Args:
         player_mapping_entry: Player mapping dict containing fpl_id, sofasport_id, etc.
         client: SofaSportClient instance
     
     Returns:
-        SofasportPlayerSeasonStats instance or None if error
+        The response's 'data' payload or None if unavailable
     """
     fpl_id = player_mapping_entry.get('fpl_id')
     sofasport_player_id = player_mapping_entry.get('sofasport_id')
-    fpl_team_id = player_mapping_entry.get('fpl_team_id')
-    sofasport_team_id = player_mapping_entry.get('sofasport_team_id')
     
     if not all([fpl_id, sofasport_player_id]):
         return None
     
+    try:
+        stats_data = client.get_player_season_statistics(str(sofasport_player_id))
+    except Exception as e:
+        print(f"         ❌ API error: {e}")
+        return None
+    
+    if not stats_data or 'data' not in stats_data:
+        return None
+    
+    return stats_data['data']
+
+
+def process_player_season_stats(
+    player_mapping_entry: Dict,
+    data: Dict
+) -> Optional[Tuple[SofasportPlayerSeasonStats, bool]]:
+    """
+    Store season statistics for a single player.
+    
+    Args:
+        player_mapping_entry: Player mapping dict containing fpl_id, sofasport_id, etc.
+        data: 'data' payload returned by fetch_player_season_stats
+    
+    Returns:
+        (SofasportPlayerSeasonStats, created) or None if the athlete is unknown
+    """
+    fpl_id = player_mapping_entry.get('fpl_id')
+    sofasport_player_id = player_mapping_entry.get('sofasport_id')
+    fpl_team_id = player_mapping_entry.get('fpl_team_id')
+    sofasport_team_id = player_mapping_entry.get('sofasport_team_id')
+    
     try:
         athlete = Athlete.objects.get(id=fpl_id)
     except Athlete.DoesNotExist:
@@ -92,87 +171,75 @@ def process_player_season_stats(
     except Team.DoesNotExist:
         team = None
     
-    # Fetch season statistics from API
-    try:
-        stats_data = client.get_player_season_statistics(str(sofasport_player_id))
-    except Exception as e:
-        print(f"         ❌ API error: {e}")
-        return None
-    
-    if not stats_data or 'data' not in stats_data:
-        return None
-    
-    data = stats_data['data']
     statistics = data.get('statistics', {})
     team_data = data.get('team', {})
     
     # Extract and convert key statistics
     # Use safe conversions to handle None values and type mismatches
+    get_stat = statistics.get
+    defaults = {field: safe_int(get_stat(key)) for field, key in _INT_FIELDS}
+    defaults.update(
+        (field, safe_decimal(get_stat(key), max_digits, decimal_places))
+        for field, key, max_digits, decimal_places in _DECIMAL_FIELDS
+    )
+    defaults.update({
+        'sofasport_player_id': sofasport_player_id,
+        'team': team,
+        'sofasport_team_id': sofasport_team_id or team_data.get('id'),
+        # Store full statistics JSON
+        'statistics': statistics,
+    })
     
     # Create or update season stats record
     season_stats, created = SofasportPlayerSeasonStats.objects.update_or_create(
         athlete=athlete,
         season_id='76986',  # 2025/26 season
-        defaults={
-            'sofasport_player_id': sofasport_player_id,
-            'team': team,
-            'sofasport_team_id': sofasport_team_id or team_data.get('id'),
-            
-            # Key stats
-            'rating': safe_decimal(statistics.get('rating')),
-            'total_rating': safe_decimal(statistics.get('totalRating'), 8, 2),
-            'count_rating': safe_int(statistics.get('countRating')),
-            'minutes_played': safe_int(statistics.get('minutesPlayed')),
-            'appearances': safe_int(statistics.get('appearances')),
-            
-            # Attacking stats
-            'goals': safe_int(statistics.get('goals')),
-            'assists': safe_int(statistics.get('assists')),
-            'expected_assists': safe_decimal(statistics.get('expectedAssists')),
-            'big_chances_created': safe_int(statistics.get('bigChancesCreated')),
-            'big_chances_missed': safe_int(statistics.get('bigChancesMissed')),
-            'total_shots': safe_int(statistics.get('totalShots')),
-            'shots_on_target': safe_int(statistics.get('shotsOnTarget')),
-            
-            # Passing stats
-            'accurate_passes': safe_int(statistics.get('accuratePasses')),
-            'total_passes': safe_int(statistics.get('totalPasses')),
-            'accurate_passes_percentage': safe_decimal(statistics.get('accuratePassesPercentage'), 5, 2),
-            'key_passes': safe_int(statistics.get('keyPasses')),
-            'accurate_long_balls': safe_int(statistics.get('accurateLongBalls')),
-            'accurate_long_balls_percentage': safe_decimal(statistics.get('accurateLongBallsPercentage'), 5, 2),
-            
-            # Defensive stats
-            'tackles': safe_int(statistics.get('tackles')),
-            'interceptions': safe_int(statistics.get('interceptions')),
-            'clearances': safe_int(statistics.get('clearances')),
-            
-            # Duel stats
-            'total_duels_won': safe_int(statistics.get('totalDuelsWon')),
-            'total_duels_won_percentage': safe_decimal(statistics.get('totalDuelsWonPercentage'), 5, 2),
-            'aerial_duels_won': safe_int(statistics.get('aerialDuelsWon')),
-            'ground_duels_won': safe_int(statistics.get('groundDuelsWon')),
-            
-            # Discipline
-            'yellow_cards': safe_int(statistics.get('yellowCards')),
-            'red_cards': safe_int(statistics.get('redCards')),
-            'fouls': safe_int(statistics.get('fouls')),
-            'was_fouled': safe_int(statistics.get('wasFouled')),
-            
-            # Goalkeeper stats
-            'saves': safe_int(statistics.get('saves')),
-            'saves_percentage': safe_decimal(statistics.get('savedShotsFromInsideTheBoxPercentage'), 5, 2),
-            'clean_sheets': safe_int(statistics.get('cleanSheet')),
-            'goals_conceded': safe_int(statistics.get('goalsConceded')),
-            
-            # Store full statistics JSON
-            'statistics': statistics
-        }
+        defaults=defaults
     )
     
     return season_stats, created
 
 
+def write_season_stats(batch: List[Tuple[Dict, Dict]], totals: Dict):
+    """
+    Store a batch of fetched season stats in a single transaction.
+    
+    Each player is written in its own savepoint so one bad row only rolls
+    back itself, not the rest of the batch.
+    """
+    with transaction.atomic():
+        for player_data, data in batch:
+            player_name = player_data.get('sofasport_name', 'Unknown')
+            fpl_name = player_data.get('fpl_web_name', 'Unknown')
+            
+            print(f"   Processing: {player_name} ({fpl_name})...")
+            
+            try:
+                with transaction.atomic():
+                    result = process_player_season_stats(player_data, data)
+            except Exception as e:
+                totals['errors'] += 1
+                print(f"      ❌ Error: {e}")
+                continue
+            
+            if result:
+                season_stats, created = result
+                totals['processed'] += 1
+                if created:
+                    totals['created'] += 1
+                    rating = season_stats.rating or 'N/A'
+                    goals = season_stats.goals or 0
+                    assists = season_stats.assists or 0
+                    mins = season_stats.minutes_played or 0
+                    print(f"      ✅ Created: Rating {rating}, G:{goals} A:{assists}, Mins:{mins}")
+                else:
+                    totals['updated'] += 1
+                    print(f"      🔄 Updated")
+            else:
+                totals['no_data'] += 1
+                print(f"      ⚠️  No data available")
+
+
 def main():
     """Main execution function."""
     print("="*80)
@@ -194,61 +261,53 @@ def main():
     print("   (This will take a while due to API rate limiting...)")
     print()
     
-    total_processed = 0
-    total_created = 0
-    total_updated = 0
-    total_errors = 0
-    total_no_data = 0
+    totals = {'processed': 0, 'created': 0, 'updated': 0, 'errors': 0, 'no_data': 0}
     
-    for sofasport_id, player_data in player_mapping.items():
-        player_name = player_data.get('sofasport_name', 'Unknown')
-        fpl_name = player_data.get('fpl_web_name', 'Unknown')
-        team_name = player_data.get('fpl_team_id', '?')
-        
-        print(f"   Processing: {player_name} ({fpl_name})...")
+    # API calls run on the thread pool; all DB writes happen here in the main
+    # thread, committed in batches of WRITE_BATCH_SIZE.
+    pending = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {
+            pool.submit(fetch_player_season_stats, player_data, client): player_data
+            for player_data in player_mapping.values()
+        }
         
-        try:
-            result = process_player_season_stats(player_data, client)
+        for future in as_completed(futures):
+            player_data = futures[future]
+            data = future.result()
             
-            if result:
-                season_stats, created = result
-                total_processed += 1
-                if created:
-                    total_created += 1
-                    rating = season_stats.rating or 'N/A'
-                    goals = season_stats.goals or 0
-                    assists = season_stats.assists or 0
-                    mins = season_stats.minutes_played or 0
-                    print(f"      ✅ Created: Rating {rating}, G:{goals} A:{assists}, Mins:{mins}")
-                else:
-                    total_updated += 1
-                    print(f"      🔄 Updated")
-            else:
-                total_no_data += 1
-                print(f"      ⚠️  No data available")
-        
-        except Exception as e:
-            total_errors += 1
-            print(f"      ❌ Error: {e}")
-            continue
+            if data is None:
+                totals['no_data'] += 1
+                print(f"   ⚠️  No data available: {player_data.get('sofasport_name', 'Unknown')}")
+                continue
+            
+            pending.append((player_data, data))
+            if len(pending) >= WRITE_BATCH_SIZE:
+                write_season_stats(pending, totals)
+                pending = []
+    
+    if pending:
+        write_season_stats(pending, totals)
     
     print()
     print("="*80)
     print("SEASON STATS ETL SUMMARY")
     print("="*80)
     print(f"Total players in mapping: {len(player_mapping)}")
-    print(f"Successfully processed: {total_processed}")
-    print(f"  - Created new: {total_created}")
-    print(f"  - Updated existing: {total_updated}")
-    print(f"No data available: {total_no_data}")
-    print(f"Errors: {total_errors}")
+    print(f"Successfully processed: {totals['processed']}")
+    print(f"  - Created new: {totals['created']}")
+    print(f"  - Updated existing: {totals['updated']}")
+    print(f"No data available: {totals['no_data']}")
+    print(f"Errors: {totals['errors']}")
     print()
     
     # Show top players by rating
     print("🌟 TOP 10 PLAYERS BY RATING:")
     top_players = SofasportPlayerSeasonStats.objects.filter(
         rating__isnull=False
-    ).select_related('athlete', 'team').order_by('-rating')[:10]
+    ).select_related('athlete', 'team').only(
+        'rating', 'goals', 'assists', 'minutes_played', 'athlete__web_name', 'team__name'
+    ).order_by('-rating')[:10]
     
     for i, stats in enumerate(top_players, 1):
         print(f"   {i}. {stats.athlete.web_name} ({stats.team.name if stats.team else 'Unknown'})")
@@ -1,9 +1,9 @@
 """
 Check which FPL players are not mapped to SofaSport
 """
-import json
 import sys
 import os
+from collections import defaultdict
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -21,40 +21,46 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fpl_platform.settings')
 import django
 django.setup()
 
+from django.db.models import F
 from etl.models import Athlete
+from mapping_loader import load_player_mapping
 
 # Load player mapping
-mapping_path = Path(__file__).parent.parent / 'mappings' / 'player_mapping.json'
-with open(mapping_path, 'r') as f:
-    player_mapping = json.load(f)
+player_mapping = load_player_mapping()
 
 # Get mapped FPL player IDs
 mapped_fpl_ids = {p['fpl_id'] for p in player_mapping.values()}
 
-# Get all FPL players
-all_players = Athlete.objects.all().select_related('team')
-total_players = all_players.count()
+# Stream only the columns we need for unmapped players (no model instances)
+unmapped_rows = (
+    Athlete.objects.exclude(id__in=list(mapped_fpl_ids))
+    .annotate(team_short=F('team__short_name'))
+    .values_list('web_name', 'first_name', 'second_name', 'total_points', 'team_short')
+    .iterator(chunk_size=2000)
+)
+
+# Group unmapped by team, counting as we go
+unmapped_by_team = defaultdict(list)
+unmapped_count = 0
+for web_name, first_name, second_name, total_points, team_short in unmapped_rows:
+    unmapped_count += 1
+    full_name = f"{first_name} {second_name}".strip()
+    unmapped_by_team[team_short or 'Unknown'].append({
+        'web_name': web_name,
+        'full_name': full_name,
+        'total_points': total_points or 0
+    })
+
+# Count the table itself - mapped IDs that are no longer in Athlete (stale mapping,
+# new season) must not inflate the total
+total_players = Athlete.objects.count()
 
 print(f'📊 FPL Database Stats:')
 print(f'   Total FPL players: {total_players}')
 print(f'   Mapped to SofaSport: {len(mapped_fpl_ids)}')
-print(f'   Unmapped: {total_players - len(mapped_fpl_ids)}')
+print(f'   Unmapped: {unmapped_count}')
 print()
 
-# Group unmapped by team
-unmapped_by_team = {}
-for player in all_players:
-    if player.id not in mapped_fpl_ids:
-        team_name = player.team.short_name if player.team else 'Unknown'
-        if team_name not in unmapped_by_team:
-            unmapped_by_team[team_name] = []
-        full_name = f"{player.first_name} {player.second_name}".strip()
-        unmapped_by_team[team_name].append({
-            'web_name': player.web_name,
-            'full_name': full_name,
-            'total_points': player.total_points or 0
-        })
-
 print(f'⚠️  Unmapped players by team (sorted by total points):')
 for team in sorted(unmapped_by_team.keys()):
     players = sorted(unmapped_by_team[team], key=lambda x: x['total_points'], reverse=True)
@@ -14,15 +14,22 @@ Usage:
 
 import os
 import sys
+import threading
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
 from decimal import Decimal
+from functools import lru_cache
 from pathlib import Path
 
 import django
+import orjson
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Setup Django
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -30,6 +37,7 @@ sys.path.append(str(BASE_DIR))
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fpl_platform.settings")
 django.setup()
 
+from django.db import connection, transaction
 from django.utils import timezone
 from etl.models import SofasportFixture, FixtureOdds
 
@@ -53,7 +61,53 @@ API_HEADERS = {
 }
 
 # Rate limiting: SofaSport allows 27 calls/second, but we'll be conservative
-RATE_LIMIT_DELAY = 0.5  # seconds between requests
+RATE_LIMIT_DELAY = 0.5  # seconds between requests (per worker)
+MAX_WORKERS = int(os.getenv("SOFASPORT_ODDS_WORKERS", "8"))  # ~16 calls/second at most
+
+# Keep-alive sessions so each fixture reuses the TLS connection instead of
+# handshaking per request. Transient errors and 429s are retried with backoff.
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """
+    Pooled session for the calling worker thread.
+    
+    Sessions are kept per thread because requests.Session is not guaranteed
+    to be thread-safe.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(API_HEADERS)
+        session.mount("https://", HTTPAdapter(
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504]),
+        ))
+        _local.session = session
+    return session
+
+
+@dataclass(slots=True)
+class ParsedOdds:
+    """Odds extracted from one API response; field names match FixtureOdds columns."""
+    home_odds: Decimal | None = None
+    draw_odds: Decimal | None = None
+    away_odds: Decimal | None = None
+    over_under_line: Decimal | None = None
+    over_odds: Decimal | None = None
+    under_odds: Decimal | None = None
+    btts_yes_odds: Decimal | None = None
+    btts_no_odds: Decimal | None = None
+
+
+# Odds columns written from parse_odds_response, and the ones whose previous
+# value is kept for movement detection
+ODDS_FIELDS = tuple(field.name for field in fields(ParsedOdds))
+TRACKED_ODDS_FIELDS = (
+    "home_odds", "draw_odds", "away_odds",
+    "over_odds", "under_odds",
+    "btts_yes_odds", "btts_no_odds",
+)
 
 
 def fetch_odds_from_api(event_id: int) -> dict | None:
@@ -74,15 +128,95 @@ def fetch_odds_from_api(event_id: int) -> dict | None:
     }
     
     try:
-        response = requests.get(url, headers=API_HEADERS, params=params, timeout=10)
+        response = get_session().get(url, params=params, timeout=10)
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         logger.error(f"Failed to fetch odds for event {event_id}: {e}")
         return None
 
 
-def parse_odds_response(odds_data: dict) -> dict:
+def _fetch_odds_rate_limited(event_id: int) -> dict | None:
+    """Fetch odds for an event, then pause so each worker respects RATE_LIMIT_DELAY."""
+    try:
+        return fetch_odds_from_api(event_id)
+    finally:
+        time.sleep(RATE_LIMIT_DELAY)
+
+
+@lru_cache(maxsize=4096)
+def _dec(odds_value) -> Decimal:
+    """Decimal for an odds value as sent by the API (usually a string like "1.85").
+    
+    Bookmakers quote from a small set of prices, so the same values repeat across
+    markets and fixtures; Decimals are immutable and safe to share.
+    """
+    return Decimal(odds_value if isinstance(odds_value, str) else str(odds_value))
+
+
+_1X2_CHOICES = {"1": "home_odds", "X": "draw_odds", "2": "away_odds"}
+
+
+def _parse_1x2(market: dict, parsed: ParsedOdds) -> None:
+    """Full-time match result: choices named 1 / X / 2."""
+    if market.get("marketPeriod") != "Full-time":
+        return
+    for choice in market.get("choices", []):
+        field = _1X2_CHOICES.get(choice.get("name"))
+        odds_value = choice.get("fractionalValue")
+        if field and odds_value:
+            setattr(parsed, field, _dec(odds_value))
+
+
+def _parse_over_under(market: dict, parsed: ParsedOdds) -> None:
+    """Over/Under 2.5 goals."""
+    parsed.over_under_line = Decimal("2.5")
+    for choice in market.get("choices", []):
+        odds_value = choice.get("fractionalValue")
+        if not odds_value:
+            continue
+        name = choice.get("name", "").lower()
+        if "over" in name:
+            parsed.over_odds = _dec(odds_value)
+        elif "under" in name:
+            parsed.under_odds = _dec(odds_value)
+
+
+def _parse_btts(market: dict, parsed: ParsedOdds) -> None:
+    """Both teams to score: Yes / No."""
+    for choice in market.get("choices", []):
+        odds_value = choice.get("fractionalValue")
+        if not odds_value:
+            continue
+        name = choice.get("name", "").lower()
+        if "yes" in name:
+            parsed.btts_yes_odds = _dec(odds_value)
+        elif "no" in name:
+            parsed.btts_no_odds = _dec(odds_value)
+
+
+# Markets recognised by their (lowercased) marketGroup
+MARKET_HANDLERS = {
+    "1x2": _parse_1x2,
+    "both teams to score": _parse_btts,
+}
+
+
+def _market_handler(market: dict):
+    """Pick the parser for a market, or None if it isn't one we store."""
+    handler = MARKET_HANDLERS.get(market.get("marketGroup", "").lower())
+    if handler:
+        return handler
+    
+    market_name = market.get("marketName", "").lower()
+    if "over/under" in market_name and "2.5" in market_name:
+        return _parse_over_under
+    if "both teams to score" in market_name:
+        return _parse_btts
+    return None
+
+
+def parse_odds_response(odds_data: dict) -> ParsedOdds:
     """
     Parse odds API response and extract relevant markets.
     
@@ -90,70 +224,25 @@ def parse_odds_response(odds_data: dict) -> dict:
         odds_data: Raw API response
         
     Returns:
-        dict with parsed odds for different markets
+        ParsedOdds with the odds found for each market (None where missing)
     """
-    parsed = {
-        "home_odds": None,
-        "draw_odds": None,
-        "away_odds": None,
-        "over_under_line": None,
-        "over_odds": None,
-        "under_odds": None,
-        "btts_yes_odds": None,
-        "btts_no_odds": None,
-    }
+    parsed = ParsedOdds()
     
     if "data" not in odds_data:
         return parsed
     
     for market in odds_data["data"]:
-        market_name = market.get("marketName", "").lower()
-        market_group = market.get("marketGroup", "").lower()
-        choices = market.get("choices", [])
-        
-        # 1X2 Market (Match Result)
-        if market_group == "1x2" and market.get("marketPeriod") == "Full-time":
-            for choice in choices:
-                name = choice.get("name")
-                odds_value = choice.get("fractionalValue")
-                
-                if odds_value and name:
-                    if name == "1":  # Home win
-                        parsed["home_odds"] = Decimal(str(odds_value))
-                    elif name == "X":  # Draw
-                        parsed["draw_odds"] = Decimal(str(odds_value))
-                    elif name == "2":  # Away win
-                        parsed["away_odds"] = Decimal(str(odds_value))
-        
-        # Over/Under Market
-        elif "over/under" in market_name and "2.5" in market_name:
-            parsed["over_under_line"] = Decimal("2.5")
-            for choice in choices:
-                name = choice.get("name", "").lower()
-                odds_value = choice.get("fractionalValue")
-                
-                if odds_value:
-                    if "over" in name:
-                        parsed["over_odds"] = Decimal(str(odds_value))
-                    elif "under" in name:
-                        parsed["under_odds"] = Decimal(str(odds_value))
-        
-        # Both Teams To Score (BTTS)
-        elif "both teams to score" in market_name or market_group == "both teams to score":
-            for choice in choices:
-                name = choice.get("name", "").lower()
-                odds_value = choice.get("fractionalValue")
-                
-                if odds_value:
-                    if name == "yes" or "yes" in name:
-                        parsed["btts_yes_odds"] = Decimal(str(odds_value))
-                    elif name == "no" or "no" in name:
-                        parsed["btts_no_odds"] = Decimal(str(odds_value))
+        handler = _market_handler(market)
+        if handler:
+            handler(market, parsed)
+            # Responses carry far more markets than we store; stop once every field is set
+            if all(getattr(parsed, field) is not None for field in ODDS_FIELDS):
+                break
     
     return parsed
 
 
-def update_fixture_odds(fixture: SofasportFixture, odds_data: dict) -> bool:
+def update_fixture_odds(fixture: SofasportFixture, odds_data: ParsedOdds) -> bool:
     """
     Update or create FixtureOdds record for a fixture.
     
@@ -166,36 +255,23 @@ def update_fixture_odds(fixture: SofasportFixture, odds_data: dict) -> bool:
     """
     try:
         odds_obj, created = FixtureOdds.objects.get_or_create(fixture=fixture)
+        # auto_now timestamps are only refreshed when listed in update_fields
+        changed = ["last_updated", "updated_at"]
         
         # Store previous odds before updating (for movement detection)
-        if not created and odds_data["home_odds"]:
-            odds_obj.prev_home_odds = odds_obj.home_odds
-            odds_obj.prev_draw_odds = odds_obj.draw_odds
-            odds_obj.prev_away_odds = odds_obj.away_odds
-            odds_obj.prev_over_odds = odds_obj.over_odds
-            odds_obj.prev_under_odds = odds_obj.under_odds
-            odds_obj.prev_btts_yes_odds = odds_obj.btts_yes_odds
-            odds_obj.prev_btts_no_odds = odds_obj.btts_no_odds
+        if not created and odds_data.home_odds:
+            for field in TRACKED_ODDS_FIELDS:
+                setattr(odds_obj, f"prev_{field}", getattr(odds_obj, field))
+                changed.append(f"prev_{field}")
         
         # Update current odds
-        if odds_data["home_odds"]:
-            odds_obj.home_odds = odds_data["home_odds"]
-        if odds_data["draw_odds"]:
-            odds_obj.draw_odds = odds_data["draw_odds"]
-        if odds_data["away_odds"]:
-            odds_obj.away_odds = odds_data["away_odds"]
-        if odds_data["over_under_line"]:
-            odds_obj.over_under_line = odds_data["over_under_line"]
-        if odds_data["over_odds"]:
-            odds_obj.over_odds = odds_data["over_odds"]
-        if odds_data["under_odds"]:
-            odds_obj.under_odds = odds_data["under_odds"]
-        if odds_data["btts_yes_odds"]:
-            odds_obj.btts_yes_odds = odds_data["btts_yes_odds"]
-        if odds_data["btts_no_odds"]:
-            odds_obj.btts_no_odds = odds_data["btts_no_odds"]
+        for field in ODDS_FIELDS:
+            value = getattr(odds_data, field)
+            if value:
+                setattr(odds_obj, field, value)
+                changed.append(field)
         
-        odds_obj.save()
+        odds_obj.save(update_fields=changed)
         
         action = "Created" if created else "Updated"
         logger.info(f"{action} odds for {fixture}")
@@ -206,6 +282,96 @@ def update_fixture_odds(fixture: SofasportFixture, odds_data: dict) -> bool:
         return False
 
 
+def _build_odds_upsert_sql() -> tuple[list, str]:
+    """
+    Build the INSERT ... ON CONFLICT statement used by update_fixture_odds_bulk.
+    
+    On conflict the database copies the stored odds into prev_* and only
+    overwrites odds present in the new row (the SET expressions all read the
+    pre-update row, so the order of assignments doesn't matter).
+    
+    Returns:
+        (model fields in VALUES order, SQL up to and excluding the VALUES rows)
+    """
+    meta = FixtureOdds._meta
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+    
+    def col(name: str) -> str:
+        return qn(meta.get_field(name).column)
+    
+    insert_fields = [
+        meta.get_field(name)
+        for name in ("fixture", *ODDS_FIELDS, "provider_id", "created_at", "updated_at", "last_updated")
+    ]
+    assignments = [
+        *(f"{col(f'prev_{field}')} = {table}.{col(field)}" for field in TRACKED_ODDS_FIELDS),
+        *(f"{col(field)} = COALESCE(EXCLUDED.{col(field)}, {table}.{col(field)})" for field in ODDS_FIELDS),
+        *(f"{col(field)} = EXCLUDED.{col(field)}" for field in ("updated_at", "last_updated")),
+    ]
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(field.column) for field in insert_fields)}) VALUES {{rows}} "
+        f"ON CONFLICT ({col('fixture')}) DO UPDATE SET {', '.join(assignments)}"
+    )
+    return insert_fields, sql
+
+
+def update_fixture_odds_bulk(pairs: list[tuple[SofasportFixture, ParsedOdds]]) -> bool:
+    """
+    Upsert FixtureOdds for many fixtures.
+    
+    Rows are written with INSERT ... ON CONFLICT (fixture_id) DO UPDATE, one
+    statement per batch. The prev_* snapshot for movement detection happens in
+    the database, so existing rows never have to be loaded.
+    
+    Args:
+        pairs: (fixture, parsed odds) tuples; every parsed result must have home_odds
+        
+    Returns:
+        True if the batch was written, False otherwise
+    """
+    if not pairs:
+        return True
+    
+    try:
+        insert_fields, sql = _build_odds_upsert_sql()
+        now = timezone.now()
+        provider_id = FixtureOdds._meta.get_field("provider_id").get_default()
+        
+        rows = []
+        for fixture, odds_data in pairs:
+            values = (
+                fixture.id,
+                # falsy odds become NULL, so COALESCE keeps the stored value
+                *(getattr(odds_data, field) or None for field in ODDS_FIELDS),
+                provider_id,
+                now,
+                now,
+                now,
+            )
+            rows.append([
+                field.get_db_prep_save(value, connection)
+                for field, value in zip(insert_fields, values)
+            ])
+        
+        placeholder = f"({', '.join(['%s'] * len(insert_fields))})"
+        batch_size = connection.ops.bulk_batch_size(insert_fields, rows)
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cursor.execute(
+                    sql.format(rows=", ".join([placeholder] * len(batch))),
+                    [value for row in batch for value in row],
+                )
+        
+        logger.info(f"Stored odds for {len(rows)} fixtures")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Failed to bulk update odds for {len(pairs)} fixtures: {e}")
+        return False
+
+
 def sync_upcoming_fixtures_odds(days_ahead: int = 7) -> dict:
     """
     Fetch and store odds for all upcoming fixtures within specified days.
@@ -220,12 +386,18 @@ def sync_upcoming_fixtures_odds(days_ahead: int = 7) -> dict:
     now = timezone.now()
     cutoff = now + timedelta(days=days_ahead)
     
-    fixtures = SofasportFixture.objects.filter(
+    # Join the teams up front and load only what __str__ and the sync need,
+    # so logging a fixture doesn't trigger extra queries per row. Materialized
+    # once so the total comes from the same query as the rows.
+    fixtures = list(SofasportFixture.objects.filter(
         kickoff_time__gte=now,
         kickoff_time__lte=cutoff
-    ).order_by('kickoff_time')
+    ).select_related('home_team', 'away_team').only(
+        'id', 'sofasport_event_id', 'kickoff_time', 'match_status', 'competition',
+        'home_team_name', 'away_team_name', 'home_team__name', 'away_team__name',
+    ).order_by('kickoff_time'))
     
-    total = fixtures.count()
+    total = len(fixtures)
     logger.info(f"Found {total} upcoming fixtures in next {days_ahead} days")
     
     if total == 0:
@@ -236,43 +408,49 @@ def sync_upcoming_fixtures_odds(days_ahead: int = 7) -> dict:
     failed_count = 0
     skipped_count = 0
     
-    for i, fixture in enumerate(fixtures, 1):
-        logger.info(f"[{i}/{total}] Processing {fixture}")
-        
-        # Check if fixture is too far in the past (already started/finished)
+    # Skip fixtures that have already started/finished
+    to_fetch = []
+    for fixture in fixtures:
         if fixture.match_status in ["finished", "inprogress"]:
-            logger.info(f"  → Skipping (status: {fixture.match_status})")
+            logger.info(f"Skipping {fixture} (status: {fixture.match_status})")
             skipped_count += 1
-            continue
-        
-        # Fetch odds from API
-        odds_response = fetch_odds_from_api(fixture.sofasport_event_id)
+        else:
+            to_fetch.append(fixture)
+    
+    # Fetch odds concurrently - the work is almost entirely waiting on the API
+    logger.info(f"Fetching odds for {len(to_fetch)} fixtures with {MAX_WORKERS} workers")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        responses = list(pool.map(
+            _fetch_odds_rate_limited,
+            [fixture.sofasport_event_id for fixture in to_fetch]
+        ))
+    
+    # Parse everything, then store in one bulk upsert
+    to_store = []
+    for i, (fixture, odds_response) in enumerate(zip(to_fetch, responses), 1):
+        logger.info(f"[{i}/{len(to_fetch)}] Processing {fixture}")
         
         if not odds_response:
             logger.warning(f"  → Failed to fetch odds")
             failed_count += 1
-            time.sleep(RATE_LIMIT_DELAY)
             continue
         
         # Parse odds
         parsed_odds = parse_odds_response(odds_response)
         
         # Check if we got valid 1X2 odds
-        if not parsed_odds["home_odds"]:
+        if not parsed_odds.home_odds:
             logger.warning(f"  → No valid odds found in response")
             failed_count += 1
-            time.sleep(RATE_LIMIT_DELAY)
             continue
         
-        # Update database
-        if update_fixture_odds(fixture, parsed_odds):
-            success_count += 1
-            logger.info(f"  → Success: {parsed_odds['home_odds']} / {parsed_odds['draw_odds']} / {parsed_odds['away_odds']}")
-        else:
-            failed_count += 1
-        
-        # Rate limiting
-        time.sleep(RATE_LIMIT_DELAY)
+        logger.info(f"  → Parsed: {parsed_odds.home_odds} / {parsed_odds.draw_odds} / {parsed_odds.away_odds}")
+        to_store.append((fixture, parsed_odds))
+    
+    if update_fixture_odds_bulk(to_store):
+        success_count += len(to_store)
+    else:
+        failed_count += len(to_store)
     
     logger.info(f"\n{'='*60}")
     logger.info(f"Odds sync complete!")
@@ -311,7 +489,7 @@ def sync_single_fixture_odds(event_id: int) -> bool:
         return False
     
     parsed_odds = parse_odds_response(odds_response)
-    if not parsed_odds["home_odds"]:
+    if not parsed_odds.home_odds:
         logger.warning("No valid odds found")
         return False
     
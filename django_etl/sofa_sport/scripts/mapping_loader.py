@@ -0,0 +1,25 @@
+"""
+Shared loader for SofaSport mapping files.
+
+The mapping JSON is parsed once per process and cached, so scripts (and
+helpers imported by them) that need the mapping share a single copy instead
+of re-reading and re-parsing the file.
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+import orjson
+
+# sofa_sport/mappings, resolved from this file so it works without Django settings
+MAPPINGS_DIR = Path(__file__).resolve().parent.parent / 'mappings'
+
+
+@lru_cache(maxsize=1)
+def load_player_mapping() -> Dict[str, Dict]:
+    """
+    Load player_mapping.json (SofaSport player ID -> mapping entry).
+
+    The returned dict is shared between callers - treat it as read-only.
+    """
+    return orjson.loads((MAPPINGS_DIR / 'player_mapping.json').read_bytes())
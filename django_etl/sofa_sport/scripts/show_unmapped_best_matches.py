@@ -4,9 +4,11 @@ Show best match candidates for unmapped FPL players with points
 import json
 import sys
 import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz, process, utils
 from dotenv import load_dotenv
 
 # Load environment
@@ -16,6 +18,7 @@ load_dotenv(env_path)
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent))
 from api_client import SofaSportClient
+from mapping_loader import MAPPINGS_DIR, load_player_mapping
 
 # Add Django to path
 project_root = Path(__file__).parent.parent.parent
@@ -29,60 +32,146 @@ django.setup()
 
 from etl.models import Athlete
 
+# Concurrent squad requests; the client's rate limiter still caps the overall rate
+MAX_WORKERS = 8
+
+
+def fetch_squad(client: SofaSportClient, sofa_team_id: str) -> List[Dict]:
+    """
+    Fetch a SofaSport squad as a list of {id, name, short_name} dicts.
+    
+    Returns:
+        List of players (empty if the request failed)
+    """
+    response = client.get_team_squad(sofa_team_id)
+    sofa_players = []
+    
+    if response and 'data' in response:
+        for player_data in response.get('data', {}).get('players', []):
+            player = player_data.get('player', {})
+            if player.get('id'):
+                sofa_players.append({
+                    'id': str(player.get('id')),
+                    'name': player.get('name', ''),
+                    'short_name': player.get('shortName', '')
+                })
+    return sofa_players
+
+
+# Length of the name-token prefixes used to pre-filter fuzzy match candidates
+PREFIX_LEN = 3
+
+
+def build_prefix_index(sofa_players: List[Dict]) -> Dict[str, List[int]]:
+    """
+    Index a squad by the first PREFIX_LEN characters of every name/short name token.
+    
+    Returns:
+        Dict of prefix -> positions in sofa_players
+    """
+    by_prefix = defaultdict(list)
+    for pos, player in enumerate(sofa_players):
+        tokens = f"{player['name']} {player.get('short_name') or ''}".lower().split()
+        for prefix in dict.fromkeys(token[:PREFIX_LEN] for token in tokens):
+            by_prefix[prefix].append(pos)
+    return by_prefix
+
+
+def _update_best_scores(
+    best: List[float], positions: List[int], query: str, names: List[str], scorers, processor=None
+) -> None:
+    """Score query against every name with each scorer, keeping the best per candidate."""
+    for scorer in scorers:
+        # process.extract scores the whole list in a single C call
+        for _, score, idx in process.extract(query, names, scorer=scorer, processor=processor, limit=None):
+            pos = positions[idx]
+            if score > best[pos]:
+                best[pos] = score
+
+
+def _matches_above_threshold(
+    fpl_full: str, fpl_web: str, fpl_second: str, sofa_players: List[Dict], threshold: int
+) -> List[Tuple[Dict, int]]:
+    """Score every player in sofa_players; (sofa_player, score) pairs >= threshold, best first."""
+    best = [0.0] * len(sofa_players)
+    
+    # Full names: ratio / partial / token sort against the FPL full name
+    positions = list(range(len(sofa_players)))
+    full_names = [p['name'].lower() for p in sofa_players]
+    _update_best_scores(best, positions, fpl_full, full_names, (fuzz.ratio, fuzz.partial_ratio))
+    # fuzzywuzzy's token_sort_ratio strips punctuation first; rapidfuzz only does when asked
+    _update_best_scores(
+        best, positions, fpl_full, full_names, (fuzz.token_sort_ratio,), processor=utils.default_process
+    )
+    
+    # Short names (where SofaSport has one) against surname, web name and full name
+    with_short = [i for i, p in enumerate(sofa_players) if p.get('short_name')]
+    if with_short:
+        short_names = [sofa_players[i]['short_name'].lower() for i in with_short]
+        _update_best_scores(best, with_short, fpl_second, short_names, (fuzz.ratio,))
+        _update_best_scores(best, with_short, fpl_web, short_names, (fuzz.ratio,))
+        _update_best_scores(best, with_short, fpl_full, short_names, (fuzz.partial_ratio,))
+    
+    matches = [
+        (sofa_player, round(score))
+        for sofa_player, score in zip(sofa_players, best)
+        if round(score) >= threshold
+    ]
+    
+    # Sort by score descending
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return matches
+
+
 def fuzzy_match_player_detailed(
     fpl_player: Dict,
     sofa_players: List[Dict],
-    threshold: int = 50
+    threshold: int = 50,
+    prefix_index: Optional[Dict[str, List[int]]] = None
 ) -> List[Tuple[Dict, int]]:
     """
     Find all matches above threshold with scores.
     
+    When a prefix_index (see build_prefix_index) is given, only squad players
+    sharing a name-token prefix with the FPL player are scored first. The whole
+    squad is rescored if none of them reaches the threshold, so a player with no
+    close candidate still gets the full list.
+    
+    Scores use rapidfuzz. token_sort_ratio gets utils.default_process so that,
+    like fuzzywuzzy's, it ignores punctuation ("Alexander-Arnold", "O'Brien").
+    rapidfuzz's partial_ratio finds the best alignment, while fuzzywuzzy used
+    difflib's matching blocks. Partial scores can therefore come out higher than
+    they did with fuzzywuzzy, and more candidates can clear the threshold.
+    
     Returns:
         List of (sofa_player, score) tuples sorted by score descending
     """
-    fpl_full = fpl_player['full_name']
-    fpl_web = fpl_player['web_name']
-    fpl_first = fpl_player.get('first_name', '')
-    fpl_second = fpl_player.get('second_name', '')
+    fpl_full = fpl_player['full_name'].lower()
+    fpl_web = fpl_player['web_name'].lower()
+    fpl_second = fpl_player.get('second_name', '').lower()
     
-    matches = []
+    if prefix_index is not None:
+        query_tokens = f'{fpl_full} {fpl_second} {fpl_web}'.split()
+        candidates = sorted({
+            pos
+            for prefix in dict.fromkeys(token[:PREFIX_LEN] for token in query_tokens)
+            for pos in prefix_index.get(prefix, ())
+        })
+        if candidates:
+            matches = _matches_above_threshold(
+                fpl_full, fpl_web, fpl_second, [sofa_players[pos] for pos in candidates], threshold
+            )
+            if matches:
+                return matches
     
-    for sofa_player in sofa_players:
-        sofa_name = sofa_player['name']
-        sofa_short = sofa_player.get('short_name', '')
-        
-        # Calculate various match scores
-        scores = [
-            fuzz.ratio(sofa_name.lower(), fpl_full.lower()),
-            fuzz.partial_ratio(sofa_name.lower(), fpl_full.lower()),
-            fuzz.token_sort_ratio(sofa_name.lower(), fpl_full.lower()),
-        ]
-        
-        if sofa_short:
-            scores.extend([
-                fuzz.ratio(sofa_short.lower(), fpl_second.lower()),
-                fuzz.ratio(sofa_short.lower(), fpl_web.lower()),
-                fuzz.partial_ratio(sofa_short.lower(), fpl_full.lower()),
-            ])
-        
-        max_score = max(scores)
-        
-        if max_score >= threshold:
-            matches.append((sofa_player, max_score))
-    
-    # Sort by score descending
-    matches.sort(key=lambda x: x[1], reverse=True)
-    return matches
+    return _matches_above_threshold(fpl_full, fpl_web, fpl_second, sofa_players, threshold)
 
 
 def main():
     # Load mappings
-    mapping_path = Path(__file__).parent.parent / 'mappings'
-    
-    with open(mapping_path / 'player_mapping.json', 'r') as f:
-        player_mapping = json.load(f)
+    player_mapping = load_player_mapping()
     
-    with open(mapping_path / 'team_mapping.json', 'r') as f:
+    with open(MAPPINGS_DIR / 'team_mapping.json', 'r') as f:
         team_mapping = json.load(f)
     
     # Create reverse team mapping (fpl_id -> sofasport_id)
@@ -93,29 +182,39 @@ def main():
     # Get mapped FPL player IDs
     mapped_fpl_ids = {p['fpl_id'] for p in player_mapping.values()}
     
-    # Get unmapped players with points
-    unmapped_with_points = []
-    all_players = Athlete.objects.all().select_related('team')
-    
-    for player in all_players:
-        if player.id not in mapped_fpl_ids and (player.total_points or 0) > 0:
-            unmapped_with_points.append({
-                'id': player.id,
-                'first_name': player.first_name,
-                'second_name': player.second_name,
-                'web_name': player.web_name,
-                'full_name': f'{player.first_name} {player.second_name}'.strip(),
-                'team': player.team.short_name if player.team else 'Unknown',
-                'team_id': player.team.id if player.team else None,
-                'points': player.total_points or 0
-            })
-    
-    # Sort by points descending
-    unmapped_with_points.sort(key=lambda x: x['points'], reverse=True)
+    # Get unmapped players with points - filtered and ordered in the database, as plain rows
+    unmapped_rows = (
+        Athlete.objects
+        .exclude(id__in=mapped_fpl_ids)
+        .filter(total_points__gt=0)
+        .order_by('-total_points', 'id')
+        .values('id', 'first_name', 'second_name', 'web_name', 'total_points', 'team_id', 'team__short_name')
+    )
+    unmapped_with_points = [
+        {
+            'id': row['id'],
+            'first_name': row['first_name'],
+            'second_name': row['second_name'],
+            'web_name': row['web_name'],
+            'full_name': f"{row['first_name']} {row['second_name']}".strip(),
+            'team': row['team__short_name'] if row['team_id'] is not None else 'Unknown',
+            'team_id': row['team_id'],
+            'points': row['total_points']
+        }
+        for row in unmapped_rows
+    ]
     
     # Get SofaSport client
     client = SofaSportClient()
     
+    # Many unmapped players share a team - fetch each squad once, in parallel
+    sofa_team_ids = sorted({
+        fpl_to_sofa_teams[p['team_id']] for p in unmapped_with_points if p['team_id'] in fpl_to_sofa_teams
+    })
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        squads = dict(zip(sofa_team_ids, pool.map(lambda team_id: fetch_squad(client, team_id), sofa_team_ids)))
+    squad_indexes = {team_id: build_prefix_index(players) for team_id, players in squads.items()}
+    
     print(f'\n🔍 Analyzing {len(unmapped_with_points)} Unmapped Players with Best Match Candidates')
     print('=' * 120)
     
@@ -128,22 +227,13 @@ def main():
         
         sofa_team_id = fpl_to_sofa_teams[team_id]
         
-        # Get SofaSport squad for this team
-        response = client.get_team_squad(sofa_team_id)
-        sofa_players = []
-        
-        if response and 'data' in response:
-            for player_data in response.get('data', {}).get('players', []):
-                player = player_data.get('player', {})
-                if player.get('id'):
-                    sofa_players.append({
-                        'id': str(player.get('id')),
-                        'name': player.get('name', ''),
-                        'short_name': player.get('shortName', '')
-                    })
+        # SofaSport squad for this team (prefetched above)
+        sofa_players = squads[sofa_team_id]
         
         # Find matches
-        matches = fuzzy_match_player_detailed(fpl_player, sofa_players, threshold=50)
+        matches = fuzzy_match_player_detailed(
+            fpl_player, sofa_players, threshold=50, prefix_index=squad_indexes[sofa_team_id]
+        )
         
         print(f"\n{i:2}. [{fpl_player['team']:3}] {fpl_player['web_name']:20} ({fpl_player['full_name']:40}) - {fpl_player['points']} pts")
         print(f"    FPL ID: {fpl_player['id']}, SofaSport Team ID: {sofa_team_id}")
@@ -1,5 +1,5 @@
 import requests
-import json
+import orjson
 import redis
 import os
 from dotenv import load_dotenv
@@ -7,6 +7,9 @@ import time
 import logging
 import yaml
 import psycopg2 
+from psycopg2.extras import execute_values
+import hashlib
+import pandas as pd
 
 load_dotenv()
 
@@ -59,8 +62,8 @@ if not REDIS_HOST:
 else:
     try:
         # Use redis.from_url() to connect using the full URL string
-        # decode_responses=True decodes keys/values from bytes to strings automatically
-        redis_client = redis.from_url( f"redis://{REDIS_HOST}:{REDIS_PORT}", decode_responses=True)
+        # values are left as bytes, orjson parses them directly without decoding to str first
+        redis_client = redis.from_url( f"redis://{REDIS_HOST}:{REDIS_PORT}")
         redis_client.ping() # Test the connection
         logger.info("Connected to Redis successfully using URL.")
     except redis.exceptions.ConnectionError as e:
@@ -76,7 +79,58 @@ def read_from_redis(key):
     else:
         return None
 
-#write a function that writes to PG and also take in the table name, and the confilict ID's as a list, It also needs to take a list of dict to write
+# --- Gameweek Cache ---
+# game_week -> (payload hash, processed player frame). Kept across loop iterations so
+# unchanged gameweeks are not re-parsed every cycle.
+GAME_WEEK_CACHE = {}
+
+# hash of the last general_info payload written to Postgres (and the current gameweek
+# it reported), so an unchanged payload is neither parsed nor written again
+GENERAL_INFO_STATE = {"hash": None, "current_game_week": None}
+
+def transform_game_week(game_week, game_week_data):
+    elements = orjson.loads(game_week_data)["elements"]
+    if not elements:
+        # gameweeks that haven't been played yet come back with no players
+        return pd.DataFrame()
+    # flatten every player in one pass, the 'stats' dict becomes top level columns
+    df = pd.json_normalize(elements, sep='.')
+    df.columns = df.columns.str.replace(r'^stats\.', '', regex=True)
+    df = df.drop(columns=["explain", "modified"], errors="ignore")
+    df["game_week"] = game_week
+    return df
+
+def read_game_weeks(current_game_week=None):
+    # Gameweeks finished before the previous one are settled, reuse them without touching Redis
+    settled = {
+        gw for gw in GAME_WEEK_CACHE
+        if current_game_week and gw < current_game_week - 1
+    }
+    to_check = [gw for gw in range(1, 39) if gw not in settled]
+
+    # one round-trip for every gameweek we still need to look at
+    payloads = redis_client.mget(["game_week_data_{}".format(gw) for gw in to_check]) if redis_client else []
+    for game_week, game_week_data in zip(to_check, payloads):
+        if game_week_data is None:
+            logger.warning(f"No data in Redis for game week {game_week}")
+            continue
+        digest = hashlib.blake2b(game_week_data, digest_size=16).hexdigest()
+        cached = GAME_WEEK_CACHE.get(game_week)
+        if cached and cached[0] == digest:
+            continue
+        GAME_WEEK_CACHE[game_week] = (digest, transform_game_week(game_week, game_week_data))
+
+    frames = [
+        GAME_WEEK_CACHE[game_week][1] for game_week in sorted(GAME_WEEK_CACHE)
+        if not GAME_WEEK_CACHE[game_week][1].empty
+    ]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    # stats missing for some players come back as NaN, write them as NULL
+    return df.astype(object).where(df.notna(), None)
+
+#write a function that writes to PG and also take in the table name, and the confilict ID's as a list, It also needs to take a list of dict (or a DataFrame) to write
 
 def bulk_write_to_pg(table_name, conflict_id_list, list_of_dict, pg_config):
     # establish a connection to Postgres
@@ -90,38 +144,46 @@ def bulk_write_to_pg(table_name, conflict_id_list, list_of_dict, pg_config):
         # create a cursor
         cur = conn.cursor()
         
-        # Get the first item to determine the columns
-        first_item = list_of_dict[0]
-        columns = first_item.keys()
+        if isinstance(list_of_dict, pd.DataFrame):
+            columns = list_of_dict.columns
+        else:
+            # Get the first item to determine the columns
+            first_item = list_of_dict[0]
+            columns = first_item.keys()
         
-        # Create the SQL statement
-        sql = """INSERT INTO {} ({}) VALUES ({}) ON CONFLICT ({}) DO NOTHING""".format(
+        # Create the SQL statement - execute_values expands the single %s into all rows
+        sql = """INSERT INTO {} ({}) VALUES %s ON CONFLICT ({}) DO NOTHING""".format(
             table_name,
             ','.join(columns),
-            ','.join(['%s'] * len(columns)),
             ','.join(conflict_id_list)
         )
         
         # Convert any JSON/dict values to strings
         def convert_value(value):
             if isinstance(value, dict):
-                return json.dumps(value)
+                return orjson.dumps(value).decode()
             return value
         
         # Prepare the values for insertion
-        values = []
-        for item in list_of_dict:
-            converted_values = [convert_value(v) for v in item.values()]
-            values.append(tuple(converted_values))
+        if isinstance(list_of_dict, pd.DataFrame):
+            # already flat, rows go straight through as plain tuples
+            values = list(list_of_dict.itertuples(index=False, name=None))
+        else:
+            values = []
+            for item in list_of_dict:
+                converted_values = [convert_value(v) for v in item.values()]
+                values.append(tuple(converted_values))
         
-        # bulk insert
-        cur.executemany(sql, values)
+        # bulk insert, 10k rows per statement instead of one round-trip per row
+        execute_values(cur, sql, values, page_size=10000)
         # commit the changes
         conn.commit()
         # close the cursor and connection
         cur.close()
+        return True
     except (Exception, psycopg2.DatabaseError) as error:
         logger.error(error)
+        return False
     finally:
         if conn is not None:
             conn.close()
@@ -131,25 +193,29 @@ def bulk_write_to_pg(table_name, conflict_id_list, list_of_dict, pg_config):
 
 if __name__ == "__main__":
     while True: 
-        generic_data_dict = json.loads(read_from_redis("general_info"))
-        team_data_dict = generic_data_dict["teams"]
-        bulk_write_to_pg("teams",["id"],team_data_dict,pg_config)
-        player_data = generic_data_dict["elements"]
-        bulk_write_to_pg("athletes",["id"],player_data,pg_config)
-        player_data_list=[]
-        for game_week in range(1,39):
-            game_week_data = read_from_redis("game_week_data_{}".format(game_week))
-            game_week_data_dict = json.loads(game_week_data)["elements"]
-            for player in game_week_data_dict:
-                # add a key game_week to the player dictionary
-                player["game_week"] = game_week
-                #take all the stats from the key 'stats' and add them to the player dictionary then remove the stats key
-                player.update(player.pop("stats"))
-                #remove the key 'explain'
-                player.pop("explain", None)
-                player.pop("modified", None)
-                player_data_list.append(player)
-        bulk_write_to_pg("athlete_stats",["id","game_week"],player_data_list,pg_config)
+        general_info = read_from_redis("general_info")
+        general_info_hash = hashlib.blake2b(general_info, digest_size=16).hexdigest()
+        if general_info_hash != GENERAL_INFO_STATE["hash"]:
+            generic_data_dict = orjson.loads(general_info)
+            team_data_dict = generic_data_dict["teams"]
+            teams_written = bulk_write_to_pg("teams",["id"],team_data_dict,pg_config)
+            player_data = generic_data_dict["elements"]
+            athletes_written = bulk_write_to_pg("athletes",["id"],player_data,pg_config)
+            current_game_week = next(
+                (event["id"] for event in generic_data_dict.get("events", []) if event.get("is_current")),
+                None
+            )
+            # only remember the payload once it is in Postgres, so a failed write is retried
+            GENERAL_INFO_STATE["current_game_week"] = current_game_week
+            if teams_written and athletes_written:
+                GENERAL_INFO_STATE["hash"] = general_info_hash
+            # free the parsed payload before the gameweeks are loaded
+            del generic_data_dict, team_data_dict, player_data
+        else:
+            logger.info("general_info unchanged, skipping teams and athletes.")
+        del general_info
+        player_data_df = read_game_weeks(GENERAL_INFO_STATE["current_game_week"])
+        bulk_write_to_pg("athlete_stats",["id","game_week"],player_data_df,pg_config)
         logger.info("Data written to Postgres successfully.")
         logger.info("Sleeping for 5 minutes...")
         time.sleep(300)
@@ -1,11 +1,16 @@
 import requests
-import json
+import orjson
 import redis
 import os
 from dotenv import load_dotenv
 import time
 import logging
 import yaml
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 
@@ -57,6 +62,9 @@ MANAGER_DATA = load_urls["MANAGER_DATA"]
 LOCK_TIMEOUT = 10 
 LOCK_ACQUIRE_TIMEOUT = 5  # How long to wait trying to acquire lock
 
+# Number of endpoints polled in parallel - the FPL API is fine with ~10 concurrent GETs
+POLL_WORKERS = int(os.environ.get("POLL_WORKERS", 10))
+
 # --- Redis Configuration ---
 # Load Redis connection details from environment variables
 REDIS_HOST = os.environ.get("REDIS_HOST")
@@ -79,6 +87,35 @@ else:
         logger.error(f"An unexpected error occurred during Redis connection: {e}")
         redis_client = None
 
+# --- HTTP Sessions ---
+# Keep-alive connections to the FPL API are reused across the ~40 polls per cycle.
+# Each poll worker gets its own session because requests.Session is not
+# guaranteed to be thread-safe.
+_thread_local = threading.local()
+
+def get_session():
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+        ))
+        _thread_local.session = session
+    return session
+
+# --- Conditional Write ---
+# Only rewrite a key when its payload hash changed, compared server-side against <key>:h
+# so the previous payload never has to be pulled back over the network
+WRITE_IF_CHANGED = """
+local h = redis.call('GET', KEYS[1] .. ':h')
+if h == ARGV[1] and redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+redis.call('SET', KEYS[1] .. ':h', ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+write_if_changed = redis_client.register_script(WRITE_IF_CHANGED) if redis_client else None
+DATA_TTL = 3600
+
 class RedisLockManager:
     def __init__(self, redis_client, lock_key, timeout=LOCK_TIMEOUT):
         self.redis_client = redis_client
@@ -112,17 +149,19 @@ class RedisLockManager:
 
 # lets write a polling function that polls every x seconds
 def poll_api(url, redis_client, lock_key, timeout=LOCK_TIMEOUT):
-    with RedisLockManager(redis_client, lock_key, timeout) as lock:
+    # lock lives on its own key so it never collides with (or deletes) the data key
+    with RedisLockManager(redis_client, f"{lock_key}:lock", timeout) as lock:
         if lock:
             try:
-                response = requests.get(url)
+                response = get_session().get(url, timeout=30)
                 response.raise_for_status()
-                data = response.json()
-                current_data = redis_client.get(lock_key)
-                if current_data is None or current_data != json.dumps(data):
-                    redis_client.set(lock_key, json.dumps(data), ex=3600)
+                data = orjson.loads(response.content)
+                raw = orjson.dumps(data)
+                digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+                if not write_if_changed(keys=[lock_key], args=[digest, raw, DATA_TTL]):
+                    logger.debug(f"{lock_key} unchanged, skipped write")
                 return data
-            except requests.exceptions.RequestException as e:
+            except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
                 logger.error(f"Error polling API: {e}")
                 return None
         else:
@@ -130,16 +169,27 @@ def poll_api(url, redis_client, lock_key, timeout=LOCK_TIMEOUT):
             return None
     
 
-#Let's poll GENERAL_INFO endpoint every 5 mins
-while True:
-    poll_api(BASE_URL + GENERAL_INFO, redis_client, "general_info")
-    logger.info("Polled GENERAL_INFO endpoint successfully.")
-    poll_api(BASE_URL + FIXTURES, redis_client, "fixtures")
-    logger.info("Polled FIXTURES endpoint successfully.")
-    for game_week in range(1,39):
-        poll_api(BASE_URL + GAMEWEEK_DATA.format(event_id=game_week), redis_client, "game_week_data_{}".format(game_week))
-        logger.info("Polled GAMEWEEK_DATA endpoint successfully.")   
-    logger.info("Sleeping for 5 minutes...")
-    time.sleep(300)
+# (url, redis key) for every endpoint polled each cycle
+POLL_TARGETS = [
+    (BASE_URL + GENERAL_INFO, "general_info"),
+    (BASE_URL + FIXTURES, "fixtures"),
+] + [
+    (BASE_URL + GAMEWEEK_DATA.format(event_id=game_week), "game_week_data_{}".format(game_week))
+    for game_week in range(1,39)
+]
+
+def poll_target(target):
+    url, key = target
+    data = poll_api(url, redis_client, key)
+    if data is not None:
+        logger.info(f"Polled {key} successfully.")
+    return data
+
+#Let's poll all endpoints every 5 mins, several at a time (each key still has its own lock)
+with ThreadPoolExecutor(max_workers=POLL_WORKERS) as pool:
+    while True:
+        list(pool.map(poll_target, POLL_TARGETS))
+        logger.info("Sleeping for 5 minutes...")
+        time.sleep(300)
 
 
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import orjson
+
+# fpl-etl.py has a hyphen in its name, so it is loaded from its path. REDIS_HOST is
+# blanked while it loads (load_dotenv doesn't override it) so importing the script
+# doesn't connect to Redis; the tests below swap in a fake client instead.
+_FPL_ETL_PATH = Path(__file__).resolve().parent.parent / "fpl-etl.py"
+_spec = importlib.util.spec_from_file_location("fpl_etl", _FPL_ETL_PATH)
+fpl_etl = importlib.util.module_from_spec(_spec)
+with mock.patch.dict(os.environ, {"REDIS_HOST": ""}):
+    _spec.loader.exec_module(fpl_etl)
+
+
+class _FakeRedis:
+    def __init__(self, payloads: dict[str, bytes]) -> None:
+        self.payloads = payloads
+
+    def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.payloads.get(key) for key in keys]
+
+
+def _game_week_payload(elements: list[dict]) -> bytes:
+    return orjson.dumps({"elements": elements})
+
+
+class TransformGameWeekTests(unittest.TestCase):
+    def test_empty_game_week(self) -> None:
+        df = fpl_etl.transform_game_week(30, _game_week_payload([]))
+        self.assertTrue(df.empty)
+
+    def test_flattens_stats(self) -> None:
+        df = fpl_etl.transform_game_week(
+            3,
+            _game_week_payload([
+                {"id": 1, "stats": {"minutes": 90, "total_points": 6}, "explain": [], "modified": False},
+                {"id": 2, "stats": {"minutes": 45}, "explain": [], "modified": False},
+            ]),
+        )
+        self.assertEqual(list(df.columns), ["id", "minutes", "total_points", "game_week"])
+        self.assertEqual(df["game_week"].tolist(), [3, 3])
+        self.assertEqual(df["minutes"].tolist(), [90, 45])
+        self.assertTrue(df["total_points"].isna().iloc[1])
+
+
+class ReadGameWeeksTests(unittest.TestCase):
+    def setUp(self) -> None:
+        fpl_etl.GAME_WEEK_CACHE.clear()
+        self.addCleanup(fpl_etl.GAME_WEEK_CACHE.clear)
+        self._redis_client = fpl_etl.redis_client
+        self.addCleanup(setattr, fpl_etl, "redis_client", self._redis_client)
+
+    def test_unplayed_and_partial_game_weeks(self) -> None:
+        # gameweeks that haven't been played yet have no elements
+        payloads = {f"game_week_data_{gw}": _game_week_payload([]) for gw in range(2, 39)}
+        payloads["game_week_data_1"] = _game_week_payload([
+            {"id": 1, "stats": {"minutes": 90, "total_points": 6}, "explain": []},
+            {"id": 2, "stats": {"minutes": 10}, "explain": []},
+        ])
+        fpl_etl.redis_client = _FakeRedis(payloads)
+
+        df = fpl_etl.read_game_weeks(current_game_week=1)
+
+        self.assertEqual(len(df), 2)
+        self.assertEqual(df["game_week"].tolist(), [1, 1])
+        # missing stats are written as NULL
+        self.assertEqual(df["total_points"].tolist(), [6, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,29 +13,29 @@ warnings.filterwarnings('ignore')
 url_teams_table="https://api.sofascore.com/api/v1/unique-tournament/17/season/41886/standings/total" # url for all teams in a table
 url_players="https://api.sofascore.com/api/v1/team/{}/unique-tournament/17/season/41886/top-players/overall" #for each team to get player IDs
 import requests
+import orjson
 import pandas as pd
 import numpy as np
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-def flatten(d, parent_key='', sep='_'):
-    items = []
-    for k, v in d.items():
-        new_key = parent_key + sep + k if parent_key else k
-        if isinstance(v, dict):
-            items.extend(flatten(v, new_key, sep=sep).items())
-        else:
-            items.append((new_key, v))
-    return dict(items)
+#one keep-alive session per worker thread, requests.Session isn't guaranteed to be thread-safe
+thread_local = threading.local()
+def get_session():
+    if not hasattr(thread_local, "session"):
+        thread_local.session = requests.Session()
+    return thread_local.session
 
 def get_all_teams(url_teams_table):
-    r = requests.get(url_teams_table,timeout=10)
-    json = r.json()
+    r = get_session().get(url_teams_table,timeout=10)
+    json = orjson.loads(r.content)
     teams_json =json["standings"][0]["rows"]
 
     return teams_json
 def get_player_stats(url_players,team_id):
     url_players=url_players.format(team_id)
-    r = requests.get(url_players,timeout=10)
-    json = r.json()
+    r = get_session().get(url_players,timeout=10)
+    json = orjson.loads(r.content)
     player_stats_json =json["topPlayers"]["rating"]
     
     return player_stats_json
@@ -44,11 +44,8 @@ def get_player_stats(url_players,team_id):
 
 
 def df_maker(list_of_dict):
-    df_return = pd.DataFrame()
-    for i in range(len(list_of_dict)):
-        list_of_dict[i] = flatten(list_of_dict[i])
-        df_return = df_return.append(list_of_dict[i], ignore_index=True)
-    return df_return
+    # flattens nested dicts into parent_child columns in one pass
+    return pd.json_normalize(list_of_dict, sep='_')
 
 
 
@@ -56,21 +53,25 @@ teams_json = get_all_teams(url_teams_table)
 save_path="../../../data/fpl_data/advanced_stats/player_keys_2022-23/all_players-{}.csv"
 save_path_all_teams="../../../data/fpl_data/advanced_stats/team_keys_2022-23/teams.csv"
 
-players_df = pd.DataFrame()
+team_frames = []
 todays_date = datetime.datetime.today().strftime('%Y-%m-%d')
 
 print("Collecting Data For All Premier leaugue Teams")
-for team in teams_json:
+#fetch every team's players at once, results come back in the same order as teams_json
+with ThreadPoolExecutor(max_workers=10) as pool:
+    team_players=list(pool.map(lambda team: get_player_stats(url_players,team["team"]["id"]), teams_json))
+
+for team, players in zip(teams_json, team_players):
     id= team["team"]["id"]
     team_name=team["team"]["name"]
     print(team_name)
     team_slug=team["team"]["slug"]
-    df_t=get_player_stats(url_players,id)
-    df_t= df_maker(df_t)
+    df_t= df_maker(players)
     df_t["team_id"]=id
     df_t["team_name"]=team_name
     df_t["team_slug"]=team_slug
-    players_df = players_df.append(df_t, ignore_index=True)
+    team_frames.append(df_t)
+players_df = pd.concat(team_frames, ignore_index=True)
 players_df.to_csv(save_path.format(todays_date),index=False)
 teams_df = df_maker(teams_json)
 teams_df.to_csv(save_path_all_teams,index=False)
@@ -1,9 +1,10 @@
 import pandas as pd
 import numpy as np
-import fuzzywuzzy
-from fuzzywuzzy import process
-from fuzzywuzzy import fuzz
-import time
+from rapidfuzz import process, fuzz, utils
+import io
+import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 #import Levenshtein as fuzzy_match
@@ -34,29 +35,39 @@ def get_kickoff_time(df):
     df["kickoff_time"]=df["Date"].str.replace("/","-") +"Z"+df["Time"] + ":00+01:00"
     return df
 
+#one keep-alive session per download thread, requests.Session isn't guaranteed to be thread-safe
+thread_local = threading.local()
+def get_session():
+    if not hasattr(thread_local, "session"):
+        thread_local.session = requests.Session()
+    return thread_local.session
+
+def download_season_csv(season_file):
+    j, start, end = season_file
+    url="https://www.football-data.co.uk/mmz4281/{}{}/E{}.csv".format(start,end,j)
+    response = get_session().get(url, timeout=30)
+    response.raise_for_status()
+    df = pd.read_csv(io.BytesIO(response.content))
+    #save df to csv
+    df.to_csv(f"../../../data/fpl_data/past_games_raw/E{j}-{start}{end}.csv",index=False)
+    return df
+
 def get_season_data(num_seasons):
-    df_all = pd.DataFrame()
+    season_files = []
     start=24
     end=25
     for count, _ in enumerate(range(num_seasons)):
 
-        print("Reading the {}{} season: {}/{}".format(start,end,count+1,num_seasons))
+        print("Reading the {:02d}{:02d} season: {}/{}".format(start,end,count+1,num_seasons))
         for j in range(0,2):
-            if len(str(start))==1:
-                start="0"+str(start)
-            if len(str(end))==1:
-                end="0"+str(end)
-            url="https://www.football-data.co.uk/mmz4281/{}{}/E{}.csv".format(start,end,j)
-            df = pd.read_csv(url)
-            #save df to csv
-            df.to_csv(f"../../../data/fpl_data/past_games_raw/E{j}-{start}{end}.csv",index=False)
-            df_all= pd.concat([df_all,df])
-            time.sleep(2)
-        start=int(start)-1
-        end=int(end)-1
-        
-        
-    return df_all
+            season_files.append((j, "{:02d}".format(start), "{:02d}".format(end)))
+        start=start-1
+        end=end-1
+
+    #download the files a few at a time, then combine once
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        frames = list(pool.map(download_season_csv, season_files))
+    return pd.concat(frames)
 
     
 
@@ -66,9 +77,14 @@ team_names_to_check=df_past_games["HomeTeam"].unique()
 true_team_names=df_names["HomeTeam"].unique()
 
 #using fuzzy matching to find the closest match to the team name as well as the ratio of the match
+#score every true name against every candidate in one call, then take the best per row
+scores=process.cdist(true_team_names,team_names_to_check,scorer=fuzz.WRatio,processor=utils.default_process,dtype=np.uint8)
+best_idx=scores.argmax(axis=1)
+best_score=scores.max(axis=1)
+
 renaming_dict={"Tottenham":"Spurs"}
-for count, team in  enumerate(true_team_names,start=1):
-    closest_match=process.extractOne(team,team_names_to_check)
+for count, (team, idx, score) in  enumerate(zip(true_team_names,best_idx,best_score),start=1):
+    closest_match=(team_names_to_check[idx],int(score))
     if closest_match[1] > 80:
         renaming_dict[closest_match[0]]=team
         if closest_match[1] !=100:
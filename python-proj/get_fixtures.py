@@ -1,78 +1,75 @@
 import pandas as pd
 import numpy as np
-import requests
+from numpy.lib.stride_tricks import sliding_window_view
+import requests_cache
+import orjson
 from dateutil import parser 
 from datetime import datetime
 import os
+from itertools import zip_longest
+
+#responses are cached on disk for 5 minutes, then revalidated with the server's ETag/Last-Modified
+session = requests_cache.CachedSession('.fpl_cache', expire_after=300, cache_control=True)
+
 def get_team_names():
     url = 'https://fantasy.premierleague.com/api/bootstrap-static/'
-    r = requests.get(url)
-    json = r.json()
+    r = session.get(url)
+    json = orjson.loads(r.content)
     teams_df = pd.DataFrame(json['teams'])
     return teams_df
 def get_fixtures():
     url = 'https://fantasy.premierleague.com/api/fixtures/'
-    r = requests.get(url)
-    json = r.json()
+    r = session.get(url)
+    json = orjson.loads(r.content)
     fixtures_df = pd.DataFrame(json)
     #map team names to team id
     teams_df = get_team_names()
-    fixtures_df["HomeTeam"]=fixtures_df["team_h"].map(teams_df.set_index("id")["name"])
-    fixtures_df["AwayTeam"]=fixtures_df["team_a"].map(teams_df.set_index("id")["name"])
+    team_name_by_id = teams_df.set_index("id")["name"]
+    fixtures_df["HomeTeam"]=fixtures_df["team_h"].map(team_name_by_id)
+    fixtures_df["AwayTeam"]=fixtures_df["team_a"].map(team_name_by_id)
+    # replace all spaces with a "+" in the team names, once per team rather than once per fixture
+    team_logo_by_id = team_name_by_id.str.replace(" ", "+")
+    fixtures_df["HomeTeam_logo"]=fixtures_df["team_h"].map(team_logo_by_id)
+    fixtures_df["AwayTeam_logo"]=fixtures_df["team_a"].map(team_logo_by_id)
     # convert date to to date time with uct +01:00
     fixtures_df["kickoff_time"]=fixtures_df["kickoff_time"].str.replace("Z","+01:00")
     # fixtures_df["kickoff_time"]=fixtures_df["kickoff_time"].apply(parser.parse)
     return fixtures_df
 def fixture_diff_calc(df):
     #this fucntion retrieves the fdr for a teams next 5 games
-    df_return= pd.DataFrame()
-    fdr_dict={}
     teams = df["HomeTeam"].unique()
-    for event in range(1,int(df["event"].max())):
-        fdr_dict[event]={}
-        
-        for team in teams:
-            fdr_dict[event][team]={}
-            next_5_diff_rating=[]
-            for week in range(event,event+5):
-                df_week = df[df["event"]==week]
-                df_week_team = df_week[(df_week["HomeTeam"]==team)|(df_week["AwayTeam"]==team)].reset_index(drop=True)
-                if df_week_team.shape[0]==1:
-                    #check if team is home or away
-                    if df_week_team.iloc[0]["HomeTeam"]==team:
-                        rating = df_week_team.iloc[0]["team_h_difficulty"]
-                        # check if rating is not None  
-                        if rating!=None:
-                            next_5_diff_rating.append(rating)
-                    else:
-                        rating = df_week_team.iloc[0]["team_a_difficulty"]
-                        if rating!=None:
-                            next_5_diff_rating.append(rating)
-
-           
-            fdr_dict[event][team]["fdr_5_mean"]=np.mean(next_5_diff_rating)
-            #convert next_5_diff_rating to strings
-            next_5_diff_rating = [str(x) for x in next_5_diff_rating]
-            fdr_dict[event][team]["fdr_5_list"]=next_5_diff_rating
-        df_return_week = pd.DataFrame.from_dict(fdr_dict[event], orient='index')
-        # rename index to "Team Name"
-        df_return_week.index.name = "Team_Name"
-        #change index to column
-        df_return_week.reset_index(inplace=True)
-        df_return_week["Team_Name_logo"] = df_return_week["Team_Name"].str.replace(" ", "+")
-        df_return_week["event"]=event
-        df_return = pd.concat([df_return,df_return_week])
+    last_event = int(df["event"].max())
+    # one row per team per fixture, with the difficulty from that team's point of view
+    home = df[["HomeTeam","event","team_h_difficulty"]].set_axis(["team","event","difficulty"],axis=1)
+    away = df[["AwayTeam","event","team_a_difficulty"]].set_axis(["team","event","difficulty"],axis=1)
+    team_fixtures = pd.concat([home,away],ignore_index=True).dropna(subset=["event"])
+    team_fixtures["event"] = team_fixtures["event"].astype(int)
+    # only weeks where the team plays exactly once count (blank and double gameweeks are skipped)
+    team_fixtures = team_fixtures[~team_fixtures.duplicated(subset=["team","event"],keep=False)]
+    # (team x gameweek) difficulty matrix, padded with NaN so every window has 5 weeks
+    diff = team_fixtures.pivot(index="team",columns="event",values="difficulty")
+    diff = diff.reindex(index=teams,columns=range(1,last_event+4)).to_numpy(dtype=np.float64)
+    # windows[t, e] holds the difficulty of team t for gameweeks e+1..e+5
+    windows = sliding_window_view(diff,5,axis=1)[:,:last_event-1]
+    # event-major order: every team for gameweek 1, then gameweek 2, ...
+    windows = windows.transpose(1,0,2).reshape(-1,5)
+
+    #next 5 ratings as strings, skipping weeks without a single fixture; the int->str
+    #conversion and the mask are done for the whole matrix at once
+    played = ~np.isnan(windows)
+    labels = np.where(played,windows,0).astype(np.int64).astype(str)
+
+    events = np.arange(1,last_event)
+    df_return = pd.DataFrame({
+        "Team_Name": np.tile(teams,len(events)),
+        "fdr_5_mean": np.nanmean(windows,axis=1),
+        "fdr_5_list": [row[mask].tolist() for row, mask in zip(labels,played)],
+    })
+    df_return["Team_Name_logo"] = np.tile([team.replace(" ", "+") for team in teams],len(events))
+    df_return["event"] = np.repeat(events,len(teams))
     return df_return
-def gw_diff(list:list,col:int):
-    try: 
-        list[col] 
-        return list[col]
-    except:
-        return None
 def game_schedule(df):
-    df.drop(["id"],axis=1,inplace=True)
-    home_df =df.copy()
-    away_df =df.copy()
+    df = df.drop(columns=["id"])
     away_df_rename={
         "code":"index",
         'AwayTeam':'Team_Name',
@@ -94,25 +91,21 @@ def game_schedule(df):
         'HomeTeam_logo':'Team_Name_logo',
         'AwayTeam_logo':'Oppenent_logo'} 
     
-    away_df.rename(columns=away_df_rename,inplace=True)
-    away_df["index"]=away_df["index"]*12345
-    away_df["Location"]="Away"
-    home_df.rename(columns=home_df_rename,inplace=True)
-    home_df["index"]=home_df["index"]*12345*10
-    home_df["Location"]="Home"
+    # each fixture once from the away side and once from the home side; rename/assign
+    # build the two views directly instead of copying the frame first
+    away_df = df.rename(columns=away_df_rename).assign(
+        index=lambda d: d["index"]*12345,
+        Location="Away")
+    home_df = df.rename(columns=home_df_rename).assign(
+        index=lambda d: d["index"]*12345*10,
+        Location="Home")
     df = pd.concat([away_df,home_df])
     return df
 def check_if_finished(df_check,df):
-    df_finished=df[df["finished"]==True]
-    df_finished.drop_duplicates(subset=["event","finished"],inplace=True)
-    df_finished=df_finished[["event","finished"]]
-    df_finished.reset_index(drop=True,inplace=True)
-    #map the finished column to the df_check column on the event column
-    df_check["finished"]=df_check["event"].map(df_finished.set_index("event")["finished"])
-    # replace null values in the finished column with False
-    df_check["finished"].fillna(False,inplace=True)
-
-    return df_check
+    # an event counts as finished once any of its fixtures has finished
+    finished_by_event=df.groupby("event")["finished"].any()
+    #map the finished column to the df_check column on the event column, events without fixtures are not finished
+    return df_check.assign(finished=df_check["event"].map(finished_by_event).fillna(False).astype(bool))
 
 
 
@@ -135,6 +128,26 @@ def ensure_folder_exists(folder_path):
         return False
 
 
+def save_snapshot(df, folder_path, stamp):
+    """
+    Writes a timestamped CSV to folder_path and refreshes folder_path/latest.csv.
+
+    latest.csv is a hard link to the snapshot swapped in with os.replace, so the data
+    is only encoded once and readers don't have to glob for the newest stamp.
+
+    Returns:
+        str: The path of the timestamped file.
+    """
+    snapshot_path = os.path.join(folder_path, stamp + ".csv")
+    df.to_csv(snapshot_path,index=False)
+    tmp_path = os.path.join(folder_path, "latest.csv.tmp")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    os.link(snapshot_path, tmp_path)
+    os.replace(tmp_path, os.path.join(folder_path, "latest.csv"))
+    return snapshot_path
+
+
 
 if __name__ == "__main__":
     save_path = "../fpl_data/2024/fixtures/"
@@ -149,40 +162,30 @@ if __name__ == "__main__":
     fdr_expanded_schema_path="../fpl_data/schema/fpl_fdr_expanded_schema.csv"
 
     df = get_fixtures()
-    df.drop(columns=["stats","provisional_start_time","pulse_id"],inplace=True)
-    # replace all spaces with a "+" in the team names
-    df["HomeTeam_logo"] = df["HomeTeam"].str.replace(" ", "+")
-    df["AwayTeam_logo"] = df["AwayTeam"].str.replace(" ", "+")
+    df = df.drop(columns=["stats","provisional_start_time","pulse_id"])
    
     #append todays date and time down to the minute
     today_date=datetime.now().date()
     today_time=datetime.now().time()    
-    save_path = save_path + str(today_date) + "_" + str(today_time).replace(":","") + ".csv"
-    print("saving to {}".format(save_path))
-    df.to_csv(save_path,index=False)
-    df_schedule=df.copy()
-    df["kickoff_time"]=df["kickoff_time"]+"string_maker"
-    df.to_csv(schema_path,index=False)
-
-    save_path_fdr_expanded=save_path_fdr_expanded + str(today_date) + "_" + str(today_time).replace(":","") + ".csv"
-    df_schedule=game_schedule(df_schedule)
-    df_schedule.to_csv(save_path_fdr_expanded,index=False)
-    df_schedule["kickoff_time"]=df_schedule["kickoff_time"]+"string_maker"
-    df_schedule.to_csv(fdr_expanded_schema_path,index=False)
+    stamp = str(today_date) + "_" + str(today_time).replace(":","")
+    print("saving to {}".format(save_snapshot(df,save_path,stamp)))
+    #the schema files get the suffixed kickoff_time, df itself is left untouched so no copy is needed
+    df.assign(kickoff_time=df["kickoff_time"]+"string_maker").to_csv(schema_path,index=False)
+
+    df_schedule=game_schedule(df)
+    save_snapshot(df_schedule,save_path_fdr_expanded,stamp)
+    df_schedule.assign(kickoff_time=df_schedule["kickoff_time"]+"string_maker").to_csv(fdr_expanded_schema_path,index=False)
 
     df_return = fixture_diff_calc(df)
     
-    save_path_fdr = save_path_fdr + str(today_date) + "_" + str(today_time).replace(":","") + ".csv"
-    print("saving to {}".format(save_path_fdr))
     #add an ID column
-    df_return.reset_index(drop=True,inplace=True)
+    df_return = df_return.reset_index(drop=True)
     df_return["index"]=df_return.index+1
-    df_return["+1"]=df_return["fdr_5_list"].apply(gw_diff,col=0)
-    df_return["+2"]=df_return["fdr_5_list"].apply(gw_diff,col=1)
-    df_return["+3"]=df_return["fdr_5_list"].apply(gw_diff,col=2)
-    df_return["+4"]=df_return["fdr_5_list"].apply(gw_diff,col=3)
-    df_return["+5"]=df_return["fdr_5_list"].apply(gw_diff,col=4)
+    #split the next 5 ratings into +1..+5 columns, None where a team has fewer than 5 fixtures
+    next_5 = list(zip_longest(*df_return["fdr_5_list"], fillvalue=None))
+    for k in range(5):
+        df_return["+{}".format(k+1)] = next_5[k] if k < len(next_5) else None
     df_return=check_if_finished( df_return,df)
     df_return.to_csv(fdr_schema_path,index=False)
-    df_return.to_csv(save_path_fdr,index=False)
+    print("saving to {}".format(save_snapshot(df_return,save_path_fdr,stamp)))
 
@@ -1,45 +1,52 @@
 import pandas as pd
 import numpy as np
-import requests
+import requests_cache
+import orjson
 import glob
 import sys
 from datetime import datetime
 
+#responses are cached on disk for 5 minutes, then revalidated with the server's ETag/Last-Modified
+session = requests_cache.CachedSession('.fpl_cache', expire_after=300, cache_control=True)
+
 def overall_data():
     #Accessing the premier league API
     url = 'https://fantasy.premierleague.com/api/bootstrap-static/'
-    r = requests.get(url)
-    json = r.json()
-    elements_df = pd.DataFrame(json['elements'])
+    r = session.get(url)
+    json = orjson.loads(r.content)
+    #built straight from the JSON, nothing else holds this frame so there is no need to copy it
+    slim_elements_df = pd.DataFrame(json['elements'])
     elements_types_df = pd.DataFrame(json['element_types'])
     teams_df = pd.DataFrame(json['teams'])
-    slim_elements_df= elements_df.copy()
     slim_elements_df['position'] = slim_elements_df.element_type.map(elements_types_df.set_index('id').singular_name)
-    slim_elements_df.loc[:,'team'] = slim_elements_df.team.map(teams_df.set_index('id').name)
+    slim_elements_df['team'] = slim_elements_df.team.map(teams_df.set_index('id').name)
+    #only ~20 teams and 4 positions, keep them as categories rather than repeated strings
+    slim_elements_df['position'] = slim_elements_df['position'].astype('category')
+    slim_elements_df['team'] = slim_elements_df['team'].astype('category')
     return slim_elements_df
 
 def get_week_data(game_week,slim_elements_df):
     print("reading game week {}".format(game_week))
     id_details=slim_elements_df[["id","web_name","team","position","first_name","second_name"]]
     url = "https://fantasy.premierleague.com/api/event/{}/live".format(game_week)
-    r = requests.get(url)
-    json = r.json()
-    elements_df_2 = pd.DataFrame(json['elements'])
+    r = session.get(url)
+    json = orjson.loads(r.content)
+    #flatten the nested stats in one pass over the JSON (stats.minutes, stats.goals_scored, ...)
+    elements_df_2 = pd.json_normalize(json['elements']).drop(columns="explain")
+    stats_cols = [col for col in elements_df_2.columns if col.startswith("stats.")]
     att_to_append=["web_name","team","position","first_name","second_name"]
-    for att in att_to_append:
-        elements_df_2[att]=elements_df_2.id.map(id_details.set_index("id")[att])
-        
-    json_file= elements_df_2["stats"]
-    Stats_df=pd.DataFrame(list(json_file))
-    week_df=pd.merge(elements_df_2,Stats_df,left_index=True,right_index=True)
+    #index the player details once and pull every attribute across in a single join, then the stats after them
+    week_df=elements_df_2.drop(columns=stats_cols).join(id_details.set_index("id")[att_to_append],on="id")
+    week_df=week_df.join(elements_df_2[stats_cols].rename(columns=lambda col: col[len("stats."):]))
     week_df["event"]=game_week
-    return week_df.drop(columns="explain")
+    return week_df
 
 if "__main__"==__name__:
     slim_elements_df=overall_data()
+    #the overall data doesn't change between weeks, write it once
+    slim_elements_df.to_csv(f"../fpl_data/2025/overall_player_data/overall_payer_data.csv",index=False)
     for week in range(30,39):
         today_date=datetime.now().date()
-        slim_elements_df.to_csv(f"../fpl_data/2025/overall_player_data/overall_payer_data.csv",index=False)
         save_path_player_data=f"../fpl_data/2025/player_data/public-epl-stats-players-week-{week}.csv"
         week_df=get_week_data(week,slim_elements_df)
         week_df.set_index("id").to_csv(save_path_player_data)
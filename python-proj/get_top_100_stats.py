@@ -2,7 +2,8 @@ import warnings
 
 import pandas as pd
 import numpy as np
-import requests
+import requests_cache
+import orjson
 import glob
 import sys
 from datetime import datetime
@@ -10,14 +11,17 @@ import warnings
 import os
 warnings.filterwarnings("ignore")
 
+#responses are cached on disk for 5 minutes, then revalidated with the server's ETag/Last-Modified
+session = requests_cache.CachedSession('.fpl_cache', expire_after=300, cache_control=True)
+
 def top_players(league_id="314"):
     top_ids = []
     
     url="https://fantasy.premierleague.com/api/leagues-classic/{}/standings/?page_standings={}"
     for page in range(1,3):
         print(url.format(league_id,page))
-        r = requests.get(url.format(league_id,page))
-        json = r.json()
+        r = session.get(url.format(league_id,page))
+        json = orjson.loads(r.content)
         for obj in json["standings"]["results"]:
             flp_id = obj["entry"]
             top_ids.append(flp_id)
@@ -27,38 +31,41 @@ def top_players(league_id="314"):
 
 
 def get_top_100_tansfers(top_100_ids,week,df):
-    transfers_df = pd.DataFrame()
+    transfer_rows = []
     for user in top_100_ids:
         url ="https://fantasy.premierleague.com/api/entry/{}/transfers"
         api = url.format(user)
 
-        r = requests.get(api)
-        json = r.json()
-        
-        for obj in json:
-            df_row=pd.DataFrame(pd.Series(obj)).T
-            df_row["web_name_in"]=df_row.element_in.map(df.set_index("id")["web_name"])
-            df_row["position_name_in"]=df_row.element_in.map(df.set_index("id")["position"])
-            df_row["web_name_out"]=df_row.element_out.map(df.set_index("id")["web_name"])
-            df_row["position_name_out"]=df_row.element_out.map(df.set_index("id")["position"])
-            transfers_df= pd.concat([transfers_df,df_row],ignore_index=True)#transfers_df.append(df_row)
-            
+        r = session.get(api)
+        json = orjson.loads(r.content)
+        transfer_rows.extend(json)
+    #build the frame once, then bring the player names/positions across with two joins
+    transfers_df = pd.DataFrame(transfer_rows)
+    if transfers_df.empty:
+        return transfers_df
+    players = df.set_index("id")[["web_name","position"]].rename({"position":"position_name"},axis=1)
+    transfers_df = transfers_df.join(players.add_suffix("_in"),on="element_in").join(players.add_suffix("_out"),on="element_out")
     return transfers_df
 
 
 def get_top_100_teams(top_100_ids,week,df):
     warnings.filterwarnings('ignore')
-    team_df_combined=pd.DataFrame()
+    team_frames=[]
     url="https://fantasy.premierleague.com/api/entry/{}/event/{}/picks/"
+    #index the player frame once rather than for every manager's picks
+    players = df.set_index("id")
+    name_by_id = players["web_name"]
+    pos_by_id = players["position"]
     for id_ in top_100_ids:
         api = url.format(id_,week)
-        r = requests.get(api)
-        json = r.json()
+        r = session.get(api)
+        json = orjson.loads(r.content)
         team_df=pd.DataFrame.from_dict(json["picks"])
-        team_df["web_name"]=team_df.element.map(df.set_index("id")["web_name"])
-        team_df["position_name"]=team_df.element.map(df.set_index("id")["position"])
+        team_df["web_name"]=team_df.element.map(name_by_id)
+        team_df["position_name"]=team_df.element.map(pos_by_id)
         team_df["active_chip"]=json["active_chip"]
-        team_df_combined= pd.concat([team_df_combined,team_df],ignore_index=True)#team_df_combined.append(team_df)
+        team_frames.append(team_df)
+    team_df_combined = pd.concat(team_frames,ignore_index=True) if team_frames else pd.DataFrame()
     return team_df_combined
 def ensure_folder_exists(folder_path):
     """
@@ -96,8 +103,12 @@ if "__main__"==__name__:
         team_df_combined=get_top_100_teams(top_100_ids,week,slim_elements_df)
         transfers_df["Upload_date"] =today_date
         team_df_combined["Upload_date"]=today_date
-        team_df_combined.active_chip.replace({"wildcard":"Wild Card","freehit":"Free Hit","bboost":"Bench Boost"},inplace=True)
-        team_df_combined["active_chip"]=team_df_combined["active_chip"].fillna("No Chip")
+        #a handful of chip names repeated for every pick, rename the categories instead of scanning the column
+        team_df_combined["active_chip"]=(team_df_combined["active_chip"].astype("category")
+                                         .cat.rename_categories({"wildcard":"Wild Card","freehit":"Free Hit","bboost":"Bench Boost"})
+                                         .cat.add_categories("No Chip")
+                                         .fillna("No Chip"))
+        team_df_combined["position_name"]=team_df_combined["position_name"].astype("category")
         team_df_combined=team_df_combined.rename({"position":"position_selected"},axis=1)
         team_df_combined["event"]=week
 